@@ -0,0 +1,120 @@
+"""
+Micro-benchmark: HTML → prompt text, the old BeautifulSoup path against
+src/utils/html_text.py, on large product descriptions.
+
+    python -m benchmarks.bench_html_text
+    python -m benchmarks.bench_html_text --descriptions export.csv --column description:en
+
+Without `--descriptions` a synthetic set shaped like real catalog copy is
+used (nested lists, spec tables, inline styles, entities, embedded
+script/style). BeautifulSoup is only needed for the baseline column.
+"""
+import argparse
+import csv
+import json
+import random
+import sys
+import time
+from typing import Callable, List
+
+from src.utils import html_text
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+_WORDS = ("premium stainless steel handle ergonomic grip dishwasher safe lightweight durable "
+          "finish warranty includes cotton blend breathable fabric machine wash cold tumble dry "
+          "low adjustable strap capacity litres compatible charging cable").split()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def synthetic_description(rng: random.Random, paragraphs: int) -> str:
+    parts = ['<div class="product-description" style="font-family: Arial; color:#333">']
+    for i in range(paragraphs):
+        parts.append(f"<h3>Feature&nbsp;{i + 1} &amp; details</h3>")
+        parts.append(f"<p>{_sentence(rng, 40)} <strong>{_sentence(rng, 6)}</strong> "
+                     f"<em>{_sentence(rng, 8)}</em> &ndash; <a href=\"/p/{i}\">{_sentence(rng, 3)}</a></p>")
+        parts.append("<ul>" + "".join(f"<li><span>{_sentence(rng, 10)}</span></li>" for _ in range(6)) + "</ul>")
+        if i % 4 == 0:
+            rows = "".join(f"<tr><td>{rng.choice(_WORDS)}</td><td>{rng.randint(1, 999)}&nbsp;mm</td></tr>"
+                           for _ in range(10))
+            parts.append(f'<table border="1"><tbody>{rows}</tbody></table>')
+        if i % 10 == 0:
+            parts.append("<script>window.dataLayer=window.dataLayer||[];dataLayer.push({sku:'X'});</script>")
+            parts.append("<style>.product-description p{margin:0 0 1em}</style>")
+    parts.append("</div>")
+    return "\n  ".join(parts)
+
+
+def load_descriptions(path: str, column: str) -> List[str]:
+    with open(path, encoding="utf-8", newline="") as fh:
+        return [row[column] for row in csv.DictReader(fh) if row.get(column)]
+
+
+def _bench(fn: Callable[[str], object], docs: List[str], repeat: int) -> float:
+    """Best-of-`repeat` seconds for one pass over `docs`."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for doc in docs:
+            fn(doc)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="bench_html_text", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--descriptions", help="CSV with real descriptions (e.g. a matrix export)")
+    parser.add_argument("--column", default="description:en")
+    parser.add_argument("--count", type=int, default=200, help="synthetic descriptions")
+    parser.add_argument("--paragraphs", type=int, default=40, help="synthetic size (≈1.1 KB each)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.descriptions:
+        docs = load_descriptions(args.descriptions, args.column)
+    else:
+        rng = random.Random(0)
+        docs = [synthetic_description(rng, args.paragraphs) for _ in range(args.count)]
+
+    def cold(doc: str) -> str:
+        return html_text._extract(doc)
+
+    def warm(doc: str) -> str:
+        return html_text.html_to_text(doc)
+
+    cases = {}
+    if BeautifulSoup is not None:
+        cases["bs4_html_parser"] = lambda doc: BeautifulSoup(doc, "html.parser").get_text(" ", strip=True)
+    cases["html_text_cold"] = cold
+    for doc in docs:  # fill the memo so the next case measures hits only
+        warm(doc)
+    cases["html_text_memo_hit"] = warm
+    cases["normalize_html"] = html_text.normalize_html
+
+    timings = {name: _bench(fn, docs, args.repeat) for name, fn in cases.items()}
+    base = timings.get("bs4_html_parser")
+    report = {
+        "docs": len(docs),
+        "avg_kb": round(sum(map(len, docs)) / len(docs) / 1024, 1),
+        "extractor": "lxml" if html_text.LXML_AVAILABLE else "html.parser (streaming)",
+        "results": {
+            name: {
+                "ms_per_doc": round(t / len(docs) * 1000, 3),
+                **({"speedup": round(base / t, 1)} if base else {}),
+            }
+            for name, t in timings.items()
+        },
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Micro-benchmark: src/utils/fast_json.py (orjson) against the stdlib paths
+it replaced, on overrides-matrix sized payloads.
+
+    python -m benchmarks.bench_json
+    python -m benchmarks.bench_json --products 250 --locales 8
+
+decode:  `requests.Response.json()` (old) vs `decode_response` on a
+         products-with-overrides GraphQL page, sent as raw UTF-8 and with
+         non-ASCII escaped as \\uXXXX (which one an upstream sends varies).
+encode:  Starlette `JSONResponse.render` (old) vs `FastJSONResponse.render`
+         on the `/api/overrides` matrix.
+The `*_fallback` rows are fast_json with orjson treated as not installed;
+`orjson_loads` is what decode_response used before it went back to stdlib.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+import requests
+from fastapi.responses import JSONResponse
+
+from src.utils import fast_json
+from src.utils.fast_json import FastJSONResponse, decode_response, loads
+
+_WORDS = ("acero inoxidable mango ergonómico apto lavavajillas ligero duradero garantía "
+          "algodón transpirable lavar en frío capacidad litros compatible cable de carga").split()
+
+
+def _description(rng: random.Random, paragraphs: int = 8) -> str:
+    return "".join(
+        f"<h3>{rng.choice(_WORDS).title()}</h3><p>{' '.join(rng.choice(_WORDS) for _ in range(60))}</p>"
+        "<ul>" + "".join(f"<li>{' '.join(rng.choice(_WORDS) for _ in range(8))}</li>" for _ in range(4)) + "</ul>"
+        for _ in range(paragraphs)
+    )
+
+
+def graphql_page(rng: random.Random, products: int, locales: List[str]) -> Dict[str, Any]:
+    """Shape of a products-with-overrides page: base info plus one override per locale."""
+    edges = []
+    for pid in range(1, products + 1):
+        node = {
+            "entityId": pid,
+            "basicInformation": {"name": f"Producto {pid}", "description": _description(rng)},
+        }
+        for i, loc in enumerate(locales):
+            node[f"l{i}"] = {"basicInformation": {"name": f"Producto {pid} ({loc})",
+                                                  "description": _description(rng)}}
+        edges.append({"cursor": f"YXJyYXljb25uZWN0aW9uOj{pid}", "node": node})
+    return {"data": {"store": {"products": {
+        "edges": edges, "pageInfo": {"hasNextPage": True, "endCursor": "YXJyYXk6NTA="}}}}}
+
+
+def overrides_matrix(page: Dict[str, Any], locales: List[str]) -> List[Dict[str, Any]]:
+    """Shape `/api/overrides` returns: one row per product, one entry per locale."""
+    rows = []
+    for edge in page["data"]["store"]["products"]["edges"]:
+        node = edge["node"]
+        rows.append({
+            "id": node["entityId"],
+            "name": node["basicInformation"]["name"],
+            "locales": {loc: {"name": node[f"l{i}"]["basicInformation"]["name"],
+                              "description": node[f"l{i}"]["basicInformation"]["description"]}
+                        for i, loc in enumerate(locales)},
+        })
+    return rows
+
+
+def _response(body: bytes) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = 200
+    resp._content = body
+    resp.headers["Content-Type"] = "application/json"
+    resp.encoding = "utf-8"
+    return resp
+
+
+def _bench(fn: Callable[[], Any], repeat: int, number: int) -> float:
+    """Best-of-`repeat` seconds per call."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def _fallback(fn: Callable[[], Any]) -> Callable[[], Any]:
+    def run():
+        saved, fast_json.ORJSON_AVAILABLE = fast_json.ORJSON_AVAILABLE, False
+        try:
+            return fn()
+        finally:
+            fast_json.ORJSON_AVAILABLE = saved
+    return run
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="bench_json", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=50, help="products per page")
+    parser.add_argument("--locales", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    locales = ["es", "fr", "de", "it", "pt", "nl", "pl", "sv", "da", "fi"][: args.locales]
+    page = graphql_page(rng, args.products, locales)
+    body = json.dumps(page, ensure_ascii=False).encode("utf-8")
+    matrix = overrides_matrix(page, locales)
+    resp = _response(body)
+    escaped = _response(json.dumps(page).encode("ascii"))
+
+    stdlib_response = JSONResponse(content=None)
+    fast_response = FastJSONResponse(content=None)
+    cases = {
+        "decode_utf8": {
+            "requests_json": lambda: resp.json(),
+            "decode_response": lambda: decode_response(resp),
+            "orjson_loads": lambda: loads(resp.content),
+        },
+        "decode_escaped": {
+            "requests_json": lambda: escaped.json(),
+            "decode_response": lambda: decode_response(escaped),
+            "orjson_loads": lambda: loads(escaped.content),
+        },
+        "encode": {
+            "starlette_JSONResponse": lambda: stdlib_response.render(matrix),
+            "FastJSONResponse": lambda: fast_response.render(matrix),
+            "FastJSONResponse_fallback": _fallback(lambda: fast_response.render(matrix)),
+        },
+    }
+
+    report: Dict[str, Any] = {
+        "orjson": fast_json.ORJSON_AVAILABLE,
+        "page_kb": round(len(body) / 1024, 1),
+        "matrix_kb": round(len(stdlib_response.render(matrix)) / 1024, 1),
+    }
+    for group, fns in cases.items():
+        timings = {name: _bench(fn, args.repeat, args.number) for name, fn in fns.items()}
+        base = next(iter(timings.values()))
+        report[group] = {name: {"ms": round(t * 1000, 3), "speedup": round(base / t, 1)}
+                         for name, t in timings.items()}
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Micro-benchmark: per-call logging overhead of an override write with
+DEBUG_MODE=False, the old eager path against the lazy/sampled one.
+
+    python -m benchmarks.bench_logging
+    python -m benchmarks.bench_logging --calls 20000 --sample-rate 0.01
+
+"Eager" replays what `_request` / `update_localized_product` did before:
+a uuid4 per call, an INFO line per request, and `_summarize` /
+`json.dumps(indent=2)` evaluated as debug arguments even though DEBUG is
+off. "Lazy" is the current code path. Records go to an in-memory stream
+with the app's format, so emitted INFO lines cost what they cost in prod.
+"""
+import argparse
+import io
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+# src.config requires these; the benchmark never talks to an upstream.
+for _key in ("BC_STORE_HASH", "BC_ACCESS_TOKEN", "VERTEX_API_KEY", "VERTEX_MODEL_ID"):
+    os.environ.setdefault(_key, "bench")
+
+from src.client.bc_client import _summarize  # noqa: E402
+from src.config import settings  # noqa: E402
+from src.utils.logger import LazyJson, sampled  # noqa: E402
+
+_REQ_IDS = itertools.count(1)
+
+
+def _payloads() -> tuple[Dict[str, Any], Dict[str, Any]]:
+    description = "<p>" + "Premium stainless steel, dishwasher safe, ergonomic grip. " * 60 + "</p>"
+    variables = {
+        "input": {
+            "productId": "bc/store/product/4242",
+            "localeContext": {"channelId": "bc/store/channel/1", "locale": "es"},
+            "data": {"name": "Sartén de acero inoxidable 28 cm", "description": description},
+        }
+    }
+    response = {"data": {"product": {"setProductBasicInformation": {
+        "product": {"id": "bc/store/product/4242",
+                    "overridesForLocale": {"basicInformation": {"name": "Sartén", "description": description}}},
+    }}}}
+    return variables, response
+
+
+def eager_call(log: logging.Logger, variables: Dict[str, Any], response: Dict[str, Any]) -> None:
+    req_id = uuid.uuid4().hex
+    start = datetime.now()
+    log.info("%s %s | id=%s", "POST", "https://api.bigcommerce.com/stores/x/graphql", req_id)
+    elapsed = (datetime.now() - start).total_seconds()
+    log.debug("%s %s | %s %.2fs | body=%s", "POST", "graphql", 200, elapsed, _summarize(response))
+    log.debug(f"[DEBUG] Locale={'es'} | Sending mutation with payload:")
+    log.debug(json.dumps(variables, indent=2, ensure_ascii=False))
+    log.debug(f"[DEBUG] Response from GQL:")
+    log.debug(json.dumps(response, indent=2, ensure_ascii=False))
+
+
+def lazy_call(log: logging.Logger, variables: Dict[str, Any], response: Dict[str, Any]) -> None:
+    req_id = next(_REQ_IDS)
+    start = time.perf_counter()
+    if log.isEnabledFor(logging.INFO) and sampled():
+        log.info("%s %s | id=%s", "POST", "https://api.bigcommerce.com/stores/x/graphql", req_id)
+    elapsed = time.perf_counter() - start
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("%s %s | %s %.2fs | body=%s", "POST", "graphql", 200, elapsed, _summarize(response))
+    log.debug("[DEBUG] Locale=%s | Sending mutation with payload:\n%s", "es", LazyJson(variables))
+    log.debug("[DEBUG] Response from GQL:\n%s", LazyJson(response))
+
+
+def _bench(fn: Callable[..., None], log: logging.Logger, calls: int, repeat: int) -> float:
+    variables, response = _payloads()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn(log, variables, response)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="bench_logging", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sample-rate", type=float, default=0.01,
+                        help="LOG_SAMPLE_RATE for the sampled case")
+    args = parser.parse_args(argv)
+
+    sink = io.StringIO()
+    handler = logging.StreamHandler(sink)
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    log = logging.getLogger("bench.logging")
+    log.handlers[:] = [handler]
+    log.propagate = False
+    log.setLevel(logging.INFO)  # DEBUG_MODE=False
+
+    cases = [
+        ("eager", eager_call, 1.0),
+        ("lazy_sample_1.0", lazy_call, 1.0),
+        (f"lazy_sample_{args.sample_rate}", lazy_call, args.sample_rate),
+    ]
+    timings = {}
+    for name, fn, rate in cases:
+        settings.LOG_SAMPLE_RATE = rate
+        timings[name] = _bench(fn, log, args.calls, args.repeat)
+    base = timings["eager"]
+    report = {
+        "calls": args.calls,
+        "results": {
+            name: {"us_per_call": round(t / args.calls * 1e6, 2), "speedup": round(base / t, 1)}
+            for name, t in timings.items()
+        },
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 from typing import List, Dict, Any, Optional
-from fastapi import FastAPI, Query, HTTPException, Request
+from fastapi import FastAPI, Header, Query, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 
@@ -9,39 +9,98 @@ from src.client.bc_client import BigCommerceClient
 from src.services.product_multilang_service import ProductLocalizationService
 from src.operations.product_operations import ProductOperations
 from src.queries.gql_locale_queries import get_locales
+from src.queries.gql_multilang_queries import LIST_FIELDS, normalize_fields
 from src.services.query_processors import process_gql_locales
 from src.api.generate import router as generate_router
+from src.api.webhooks import router as webhooks_router
+from src.services import matrix_io
+from src.services.cache import LOCALES_TAG, shared_cache
+from src.services.generation_service import write_to_channels
+from src.services.override_outbox import OutboxFlusher, default_outbox
+from src.services.product_listing import (DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, ProductListing,
+                                          listing_response)
+from src.utils import circuit_breaker, request_metrics
+from src.utils.cpu_executor import default_executor
+from src.utils.fast_json import FastJSONResponse
+from src.utils.priority_lanes import BULK, default_scheduler
+from src.utils.token_accounting import default_ledger
 from src import config
 
 # ─────────────────────────── FastAPI APP ──────────────────────────
-app = FastAPI(title="BigTools Multilang AI", version="1.0.0")
+app = FastAPI(title="BigTools Multilang AI", version="1.0.0",
+              default_response_class=FastJSONResponse)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], allow_credentials=True,
     allow_methods=["*"],  allow_headers=["*"],
 )
+
+@app.middleware("http")
+async def upstream_accounting(request: Request, call_next):
+    token = request_metrics.begin(request.url.path)
+    stats = request_metrics.current()
+    try:
+        response = await call_next(request)
+    except request_metrics.UpstreamBudgetExceeded as exc:
+        response = JSONResponse({"detail": str(exc)}, status_code=503)
+    finally:
+        request_metrics.end(token)
+    if "content-length" in response.headers or response.status_code in (204, 304):
+        response.headers["Server-Timing"] = stats.server_timing()
+        response.headers["X-Upstream-Calls"] = str(stats.calls)
+    else:
+        # Streamed body: its upstream calls happen after the headers are sent.
+        response.body_iterator = request_metrics.account_stream(response.body_iterator, stats)
+    return response
+
 app.include_router(generate_router)
+app.include_router(webhooks_router)
 
 templates = Jinja2Templates(directory="templates")
 
 # ─────────────────────────── Clients / Services ───────────────────
 bc_client        = BigCommerceClient(environment=config.BC_ENV or "production",
                                      debug=config.DEBUG_MODE)
-localization_srv = ProductLocalizationService(bc_client)
-product_ops      = ProductOperations(bc_client)
+localization_srv = ProductLocalizationService(bc_client, cache=shared_cache)
+product_ops      = ProductOperations(bc_client, cache=shared_cache)
+product_listing  = ProductListing(product_ops, cache=shared_cache)
+bulk_client      = BigCommerceClient(environment=config.BC_ENV or "production",
+                                     debug=config.DEBUG_MODE, lane=BULK)
+outbox_flusher   = (OutboxFlusher(default_outbox(), localization_srv,
+                                  batch_size=config.settings.OUTBOX_BATCH_SIZE,
+                                  interval=config.settings.OUTBOX_FLUSH_INTERVAL)
+                    if default_outbox() else None)
 
 # ─────────────────────────── Helpers ──────────────────────────────
 def _active_locales(channel_id: int) -> List[str]:
-    q, v  = get_locales(channel_id)
-    resp  = bc_client.graphql(q, variables=v, admin=True)
-    return [code for code, meta in process_gql_locales(resp).items()
-            if meta.get("status") == "ACTIVE"]
+    def _fetch():
+        q, v  = get_locales(channel_id)
+        resp  = bc_client.graphql(q, variables=v, admin=True)
+        return [code for code, meta in process_gql_locales(resp).items()
+                if meta.get("status") == "ACTIVE"] or None
+    return shared_cache.get_or_set(("locales", channel_id), _fetch, tags=(LOCALES_TAG,)) or []
+
+@app.on_event("startup")
+def _start_outbox_flusher():
+    if outbox_flusher:
+        outbox_flusher.start()
+
+@app.on_event("shutdown")
+def _shutdown_workers():
+    if outbox_flusher:
+        outbox_flusher.stop()
+    default_executor().shutdown()
 
 # ─────────────────────────── Basic & UI ───────────────────────────
 @app.get("/api/health")
 def health():
     return {"status": "ok", "env": config.BC_ENV, "channel": config.BC_CHANNEL_ID}
 
+@app.get("/api/metrics")
+def metrics():
+    return {"lanes": default_scheduler().snapshot(), "circuits": circuit_breaker.snapshot(),
+            "tokens": default_ledger().snapshot()}
+
 @app.get("/ui", response_class=HTMLResponse)
 def render_ui(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
@@ -49,14 +108,10 @@ def render_ui(request: Request):
 # ─────────────────────────── Catalog / Products ───────────────────
 @app.get("/api/products")
 def list_products(channel_id: int = config.BC_CHANNEL_ID,
-                  limit: int = Query(250, le=250, ge=1),
-                  page:  int = Query(1,   ge=1)):
-    offs = (page - 1) * limit
-    prod = product_ops.get_bigcommerce_products(channel_id)[offs:offs+limit]
-    return [{"id":p["id"],"name":p["name"],
-             "description":p.get("description",""),
-             "price":p.get("price"),
-             "category":(p.get("categories")or[None])[0]} for p in prod]
+                  limit: int = Query(DEFAULT_PAGE_SIZE, le=MAX_PAGE_SIZE, ge=1),
+                  page:  int = Query(1, ge=1),
+                  if_none_match: Optional[str] = Header(None)):
+    return listing_response(product_listing.page(channel_id, page, limit), if_none_match)
 
 # ─────────────────────────── Locales ──────────────────────────────
 @app.get("/api/locales", response_model=List[str])
@@ -67,37 +122,55 @@ def list_locales(channel_id: int = config.BC_CHANNEL_ID):
 @app.get("/api/overrides")
 def list_overrides(channel_id: int = config.BC_CHANNEL_ID, ids: Optional[str] = None):
     prod_ids = ([int(x) for x in ids.split(',') if x] if ids
-                else [p["id"] for p in product_ops.get_bigcommerce_products(channel_id)[:50]])
+                else list(product_ops.get_compact_catalog(channel_id).ids[:50]))
 
     locales = _active_locales(channel_id)
     rows: List[Dict[str, Any]] = []
-    for pid in prod_ids:
-        data = localization_srv.get_localized_data(pid, channel_id, locales)
-        for loc,payload in data.items():
-            rows.append({"id":pid,"locale":loc,"name":payload["name"],"description":payload["description"]})
+    for item in localization_srv.get_localized_products(channel_id, locales, prod_ids,
+                                                        fields=("name", "description")):
+        for o in item["overrides"]:
+            rows.append({"id":item["id"],"locale":o["locale"],"name":o["name"],"description":o["description"]})
     return rows
 
+# ─────────────────────────── Export overrides (CSV / XLIFF) ───────
+@app.get("/api/overrides/export")
+def export_overrides(format: str = Query("csv", pattern="^(csv|xliff)$"),
+                     source: str = "en", target: Optional[str] = None,
+                     channel_id: int = config.BC_CHANNEL_ID):
+    srv = ProductLocalizationService(bulk_client)        # uncached: streams the whole catalog
+    if format == "xliff":
+        if not target:
+            raise HTTPException(400, "'target' is required for XLIFF export")
+        rows   = matrix_io.iter_matrix(srv, channel_id, [source, target])
+        chunks = matrix_io.iter_xliff(rows, source, target)
+        return StreamingResponse(chunks, media_type="application/x-xliff+xml", headers={
+            "Content-Disposition": f'attachment; filename="overrides-{target}.xlf"'})
+    chunks = matrix_io.iter_csv(matrix_io.iter_matrix(srv, channel_id, _active_locales(channel_id)))
+    return StreamingResponse(chunks, media_type="text/csv", headers={
+        "Content-Disposition": 'attachment; filename="overrides.csv"'})
+
 # ─────────────────────────── GET products-with-overrides ──────────
 @app.get("/api/products-with-overrides")
-def products_with_overrides(ids: Optional[str]=Query(None), page:int=1, limit:int=10,
+def products_with_overrides(response: Response, ids: Optional[str]=Query(None), page:int=1,
+                            limit:int=Query(10, le=50), after: Optional[str]=None,
+                            fields:str="name,description",
                             channel_id:int=config.BC_CHANNEL_ID):
+    try:     selected=normalize_fields((f.strip() for f in fields.split(',') if f.strip()),LIST_FIELDS)
+    except ValueError as exc: raise HTTPException(400,str(exc))
+    locales=_active_locales(channel_id)
     if ids:
         try:     product_ids=[int(x) for x in ids.split(',') if x]
         except:  raise HTTPException(400,"'ids' must be integers")
-    else:
-        resp=bc_client.rest("/catalog/products",params={"limit":limit,"page":page})
-        product_ids=[p["id"] for p in resp.get("data",[])]
+        return localization_srv.get_localized_products(channel_id,locales,product_ids,fields=selected)
 
-    locales=_active_locales(channel_id)
-    items=[]
-    for pid in product_ids:
-        per=localization_srv.get_localized_data(pid,channel_id,locales)
-        if not per: continue
-        items.append({
-            "id":pid,
-            "name":next(iter(per.values()))["name"],
-            "overrides":[{"locale":loc,"name":d["name"],"description":d["description"]} for loc,d in per.items()]
-        })
+    if after is None and page>config.settings.MAX_SEEK_PAGE:
+        raise HTTPException(400,f"page is limited to {config.settings.MAX_SEEK_PAGE}; continue with after=<X-Next-Cursor>")
+    if after is None and page>1:
+        after=localization_srv.seek_cursor(channel_id,page,limit)
+    items,page_info=localization_srv.get_localized_page(channel_id,locales,first=limit,after=after,
+                                                        fields=selected)
+    if page_info.get("hasNextPage") and page_info.get("endCursor"):
+        response.headers["X-Next-Cursor"]=page_info["endCursor"]
     return items
 
 # ─────────────────────────── POST update-basic-info ───────────────
@@ -105,6 +178,11 @@ def products_with_overrides(ids: Optional[str]=Query(None), page:int=1, limit:in
 def update_basic_info(body: Dict[str, Any]):
     pid     = body["product_id"]
     locales = body["locales"]
+    if body.get("channel_ids"):
+        channel_locales = {ch: _active_locales(ch) for ch in body["channel_ids"]}
+        results = write_to_channels(localization_srv, pid, locales, channel_locales)
+        return {"status": "ok",
+                "updated": {ch: sorted(res) for ch, res in results.items()}}
     chan_id = config.BC_CHANNEL_ID
     for loc,payload in locales.items():
         localization_srv.update_localized_product(
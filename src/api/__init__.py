@@ -1 +1 @@
-from . import locales, products, product_with_overrides, generate
+from . import locales, products, product_with_overrides, generate, webhooks
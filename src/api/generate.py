@@ -1,62 +1,125 @@
-from typing import List, Dict, Any, Optional
-from fastapi import APIRouter
+import tempfile
+from typing import IO, Iterator, List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from src.api.locales import active_locales
 from src.config import settings
 from src.client.bc_client import BigCommerceClient
+from src.services.cache import shared_cache
 from src.services.product_multilang_service import ProductLocalizationService
-from src.client.vertex_client import generate_multilingual_descriptions
+from src.services.generation_service import (GENERATE, localize_products,
+                                             localize_products_multichannel, vertex_targets)
+from src.operations.product_operations import ProductOperations
+from src.services.generation_pipeline import iter_ids_file, stream_outcomes
+from src.services.override_outbox import default_outbox
+from src.utils.fast_json import dumps
+from src.utils.priority_lanes import BULK, lane
+from src.utils.token_accounting import job
 
 router = APIRouter(prefix="/api", tags=["generate"])
 
 _bc  = BigCommerceClient(environment=settings.BC_ENV, debug=settings.DEBUG_MODE)
-_srv = ProductLocalizationService(_bc)
+_srv = ProductLocalizationService(_bc, cache=shared_cache)
+# Streamed runs outlive the handler, so the lane is fixed on the client.
+_bulk_bc  = BigCommerceClient(environment=settings.BC_ENV, debug=settings.DEBUG_MODE, lane=BULK)
+_bulk_srv = ProductLocalizationService(_bulk_bc, cache=shared_cache)
+_ops      = ProductOperations(_bulk_bc, cache=shared_cache)
+# Streamed ID bodies stay in memory up to this size, then spill to disk.
+_SPOOL_MAX_MEMORY = 1 << 20
 
 class GenerateReq(BaseModel):
     ids:            List[int]
     base_language:  str = "en"
     target_locales: Optional[List[str]] = None
     channel_id:     Optional[int]  = None
+    mode:           Literal["generate", "translate"] = GENERATE
+    # Extra storefront channels to write the same generation result to.
+    channel_ids:    Optional[List[int]] = None
 
 @router.post("/generate-overrides")
-async def generate_overrides(body: GenerateReq):
+def generate_overrides(body: GenerateReq):
     channel_id      = body.channel_id or settings.BC_CHANNEL_ID
+    if body.channel_ids:
+        channel_locales = {ch: active_locales(ch) for ch in dict.fromkeys([channel_id, *body.channel_ids])}
+        with lane(BULK), job("api:generate-overrides"):
+            results = localize_products_multichannel(
+                _srv, body.ids, channel_id, channel_locales, body.base_language,
+                body.target_locales, outbox=default_outbox(), mode=body.mode,
+            )
+        return {"results": results}
+
     active_full     = active_locales(channel_id)
 
-    if body.target_locales:
-        vertex_targets = [l for l in body.target_locales if l != body.base_language]
-    else:
-        vertex_targets = [l for l in active_full if l != body.base_language]
-
-    results: Dict[int, Any] = {}
-
-    for pid in body.ids:
-        base = _srv.get_localized_data(pid, channel_id, [body.base_language])
-        base_name = base[body.base_language]["name"]
-        base_desc = base[body.base_language]["description"]
-
-        translations, err = generate_multilingual_descriptions(
-            product_id=str(pid),
-            name           = base_name,
-            features       = base_desc,
-            input_language = body.base_language,
-            target_languages = vertex_targets,
-            return_error   = True,
-        )
-
-        if err or not translations:
-            results[pid] = {"vertex_error": err or "empty_response"}
-            continue
-
-        payload = {
-            body.base_language: {"name": base_name, "description": base_desc}
-        }
-        for full_code, t in translations.items():
-            payload[full_code] = {
-                "name":        t["product_name"],
-                "description": t["description"],
-            }
-        results[pid] = _srv.update_all_locales(pid, payload, channel_id)
-
-    return {"results": results}
\ No newline at end of file
+    targets         = vertex_targets(body.base_language, body.target_locales, active_full)
+
+    with lane(BULK), job("api:generate-overrides"):
+        results = localize_products(_srv, body.ids, channel_id, body.base_language, targets,
+                                    outbox=default_outbox(), mode=body.mode)
+    return {"results": results}
+
+async def _spool_body(request: Request) -> IO[bytes]:
+    """
+    Copies the request body into a spooled temp file as it arrives.
+    StreamingResponse listens on `receive` for disconnects, so the body
+    cannot be read lazily while the response streams; spooling keeps the
+    read bounded in memory instead.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_MEMORY)
+    async for chunk in request.stream():
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+def _body_ids(spool: IO[bytes]) -> Iterator[int]:
+    return iter_ids_file(line.decode("utf-8") for line in spool)
+
+@router.post("/generate-overrides/stream")
+def generate_overrides_stream(
+    spool:          IO[bytes] = Depends(_spool_body),
+    channel_id:     Optional[int] = None,
+    base_language:  str = "en",
+    target_locales: Optional[List[str]] = Query(None),
+    mode:           Literal["generate", "translate"] = GENERATE,
+    channel_ids:    Optional[List[int]] = Query(None),
+    all_catalog:    bool = False,
+    batch_size:     int = Query(25, ge=1, le=100),
+    max_in_flight:  int = Query(2, ge=1, le=8),
+):
+    """
+    Body: product IDs as NDJSON or plain text, one per line (commas and
+    `#` comments allowed), read lazily; or `all_catalog=true` with no body.
+    Options are query parameters. Response: NDJSON, one compact outcome
+    per product as its batch completes.
+    """
+    try:
+        # One validating pass so a bad token is a 400, not a cut-off stream.
+        has_ids = sum(1 for _ in _body_ids(spool)) > 0
+    except ValueError as exc:
+        spool.close()
+        raise HTTPException(400, f"invalid product id in body: {exc}")
+    if has_ids == all_catalog:
+        spool.close()
+        raise HTTPException(400, "send product IDs in the body or set all_catalog, not both")
+    spool.seek(0)
+
+    channel_id = channel_id or settings.BC_CHANNEL_ID
+    ids = iter(_ops.get_compact_catalog(channel_id).ids) if all_catalog else _body_ids(spool)
+    channel_locales = ({ch: active_locales(ch) for ch in dict.fromkeys([channel_id, *channel_ids])}
+                       if channel_ids else None)
+    targets = vertex_targets(base_language, target_locales, active_locales(channel_id))
+
+    def lines() -> Iterator[bytes]:
+        try:
+            for outcome in stream_outcomes(
+                _bulk_srv, ids, channel_id, base_language,
+                target_locales if channel_locales else targets,
+                batch_size=batch_size, max_in_flight=max_in_flight,
+                outbox=default_outbox(), mode=mode, channel_locales=channel_locales,
+            ):
+                yield dumps(outcome) + b"\n"
+        finally:
+            spool.close()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -1,76 +1,54 @@
-from typing import List, Dict, Any
-from fastapi import APIRouter, Query
+from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Query, Response
 
 from src.api.locales import active_locales
 from src.client.bc_client import BigCommerceClient
-from src.queries.gql_multilang_queries import get_product_query, get_update_mutation
+from src.queries.gql_multilang_queries import LIST_FIELDS, get_update_mutation, normalize_fields
+from src.services.cache import product_tag, shared_cache
+from src.services.product_multilang_service import ProductLocalizationService
 from src.config import settings
 
 router = APIRouter(tags=["overrides"])
 
 _bc = BigCommerceClient(environment=settings.BC_ENV)
+_srv = ProductLocalizationService(_bc, cache=shared_cache)
 
 @router.get("/products-with-overrides")
-async def products_with_overrides(
+def products_with_overrides(
+    response: Response,
     ids: str | None = None,
     page: int = Query(1, ge=1),
-    limit: int = Query(10, le=100),
+    limit: int = Query(10, le=50),
+    after: str | None = None,
+    fields: str = "name,description",
     channel_id: int = settings.BC_CHANNEL_ID,
 ):
+    try:
+        selected = normalize_fields((f.strip() for f in fields.split(",") if f.strip()), LIST_FIELDS)
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+    locales = active_locales(channel_id)
+
     if ids:
         product_ids = [int(x) for x in ids.split(",") if x]
-    else:
-        offs, lim = (page - 1) * limit, limit
-        base = _bc.rest(
-            "/catalog/products", params={"limit": lim, "page": page}
-        ).get("data", [])
-        product_ids = [p["id"] for p in base]
-
-    locales = active_locales(channel_id)
-    gql     = get_product_query()
-    results: List[Dict[str, Any]] = []
+        return _srv.get_localized_products(channel_id, locales, product_ids, fields=selected)
 
-    for pid in product_ids:
-        per_locale = []
-        for loc in locales:
-            vars_ = {
-                "productId": f"bc/store/product/{pid}",
-                "channelId": f"bc/store/channel/{channel_id}",
-                "locale": loc,
-            }
-            data = _bc.graphql(gql, variables=vars_, admin=True) or {}
-            node = (
-                data.get("data", {})
-                .get("store", {})
-                .get("products", {})
-                .get("edges", [])
-            )
-            if not node:
-                continue
-            node = node[0].get("node", {}) or {}
-            base_info = node.get("basicInformation") or {}
-            override = node.get("overridesForLocale", {}).get("basicInformation") or {}
-            per_locale.append(
-                {
-                    "locale": loc,
-                    "name": override.get("name") or base_info.get("name"),
-                    "description": override.get("description") or base_info.get(
-                        "description"
-                    ),
-                }
-            )
-        results.append(
-            {
-                "id": pid,
-                "name": per_locale[0]["name"],
-                "overrides": per_locale,
-            }
+    if after is None and page > settings.MAX_SEEK_PAGE:
+        raise HTTPException(
+            400, f"page is limited to {settings.MAX_SEEK_PAGE}; continue with after=<X-Next-Cursor>"
         )
+    if after is None and page > 1:
+        after = _srv.seek_cursor(channel_id, page, limit)
+    results, page_info = _srv.get_localized_page(
+        channel_id, locales, first=limit, after=after, fields=selected
+    )
+    if page_info.get("hasNextPage") and page_info.get("endCursor"):
+        response.headers["X-Next-Cursor"] = page_info["endCursor"]
     return results
 
 
 @router.post("/update-basic-info")
-async def update_basic_info(body: Dict[str, Any]):
+def update_basic_info(body: Dict[str, Any]):
     pid     = body["product_id"]
     locales = body["locales"]          # { 'es': {name, description}, ... }
 
@@ -91,5 +69,6 @@ async def update_basic_info(body: Dict[str, Any]):
             "locale": loc,
         }
         _bc.graphql(get_update_mutation(), variables=variables, admin=True)
+    shared_cache.invalidate_tag(product_tag(pid))
 
     return {"status": "ok", "updated": list(locales.keys())}
@@ -1,22 +1,24 @@
-from fastapi import APIRouter, Query
+from typing import Optional
+
+from fastapi import APIRouter, Header, Query
 from src.client.bc_client import BigCommerceClient
 from src.operations import product_operations
 from src.config import settings
+from src.services.cache import shared_cache
+from src.services.product_listing import (DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, ProductListing,
+                                          listing_response)
 
 router = APIRouter(tags=["products"])
 
 _bc  = BigCommerceClient(environment=settings.BC_ENV, debug=settings.DEBUG_MODE)
-_ops = product_operations.ProductOperations(_bc)
+_ops = product_operations.ProductOperations(_bc, cache=shared_cache)
+_listing = ProductListing(_ops, cache=shared_cache)
 
 @router.get("/products")
-async def list_products(
-    limit: int = Query(10, le=100),
+def list_products(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     page:  int = Query(1,  ge=1),
     channel_id: int = settings.BC_CHANNEL_ID,
+    if_none_match: Optional[str] = Header(None),
 ):
-    offs = (page - 1) * limit
-    products = _ops.get_bigcommerce_products(channel_id)[offs : offs + limit]
-    return [
-        {"id": p["id"], "name": p["name"], "description": p.get("description")}
-        for p in products
-    ]
+    return listing_response(_listing.page(channel_id, page, limit), if_none_match)
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+from src.config import settings
+from src.client.bc_client import BigCommerceClient
+from src.operations.product_operations import ProductOperations
+from src.services.cache import shared_cache
+from src.services.webhook_invalidation import InvalidationDebouncer, verify_signature
+from src.utils.fast_json import loads
+from src.utils.priority_lanes import BULK
+
+router = APIRouter(prefix="/api", tags=["webhooks"])
+
+# Flushes run on the debounce timer, outside any request lane.
+_ops = ProductOperations(BigCommerceClient(environment=settings.BC_ENV, debug=settings.DEBUG_MODE, lane=BULK),
+                         cache=shared_cache)
+_debouncer = InvalidationDebouncer(shared_cache, delay=settings.WEBHOOK_DEBOUNCE_SECONDS,
+                                   refresh_listing=_ops.refresh_cached_catalogs)
+
+@router.post("/webhooks/bigcommerce", status_code=202)
+async def bigcommerce_webhook(request: Request):
+    """
+    Receiver for store/product/{created,updated,deleted} and channel/locale hooks.
+    Replay a recorded hook locally with:
+      curl -X POST localhost:8000/api/webhooks/bigcommerce -H 'X-Webhook-Signature: <hmac>' -d @hook.json
+    """
+    if not settings.BC_WEBHOOK_SECRET:
+        raise HTTPException(401, "webhook secret not configured")
+    body = await request.body()
+    if not verify_signature(body, request.headers.get("X-Webhook-Signature"),
+                            settings.BC_WEBHOOK_SECRET,
+                            accept_raw=settings.BC_WEBHOOK_ACCEPT_RAW_SECRET):
+        raise HTTPException(401, "invalid webhook signature")
+
+    try:
+        payload = loads(body)
+    except ValueError:
+        raise HTTPException(400, "webhook body must be JSON")
+    if not isinstance(payload, dict):
+        raise HTTPException(400, "webhook body must be a JSON object")
+
+    # With WEBHOOK_DEBOUNCE_SECONDS=0 the flush (and listing patch) runs inline.
+    accepted = await run_in_threadpool(_debouncer.submit, payload)
+    return JSONResponse({"scope": payload.get("scope"), "accepted": accepted}, status_code=202)
+
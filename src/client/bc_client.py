@@ -1,8 +1,9 @@
 import logging
+import itertools
 import os
-import uuid
+import time
 import urllib.parse
-from datetime import datetime, timedelta, timezone
+from datetime import datetime
 from importlib import import_module
 from typing import Any, Dict, List, Optional, Union
 
@@ -10,9 +11,17 @@ import requests
 from requests.adapters import HTTPAdapter
 from urllib3 import Retry
 
-from src.utils.logger import setup_logging
+from src.client.token_manager import CustomerTokenManager
+from src.queries.registry import GqlDocument
+from src.utils import request_metrics
+from src.utils.circuit_breaker import breaker, is_upstream_failure
+from src.utils.fast_json import decode_response
+from src.utils.logger import sampled, setup_logging
+from src.utils.priority_lanes import default_scheduler
 
 _LOG = setup_logging(__name__)
+# Cheap monotonic request ids instead of a uuid4 per call.
+_REQ_IDS = itertools.count(1)
 
 
 def _load_from_settings(name: str, default: Any = None) -> Any:
@@ -49,14 +58,20 @@ class BigCommerceClient:
         timeout: int = 10,
         retries: int = 3,
         backoff: float = 0.5,
+        persisted_queries: Optional[bool] = None,
+        lane: Optional[str] = None,
     ) -> None:
         self.store_hash: str = _load_from_settings("BC_STORE_HASH")
         self.access_token: str = _load_from_settings("BC_ACCESS_TOKEN")
         self.client_id: str = _load_from_settings("CLIENT_ID")
         self.client_secret: str = _load_from_settings("CLIENT_SECRET")
         self.channel_id: int = int(_load_from_settings("BC_CHANNEL_ID", 1))
-        self._cached_customer_token: Optional[str] = None
-        self._token_expires_at: Optional[datetime] = None
+        self.tokens = CustomerTokenManager(self._mint_customer_token)
+        self.persisted_queries: bool = (
+            bool(_load_from_settings("BC_GQL_PERSISTED_QUERIES", False))
+            if persisted_queries is None else persisted_queries
+        )
+        self._persisted_hashes: set = set()
 
         if not self.store_hash or not self.access_token:
             raise ValueError("BC_STORE_HASH y BC_ACCESS_TOKEN son obligatorios")
@@ -66,6 +81,10 @@ class BigCommerceClient:
         ).format(hash=self.store_hash)
 
         self.timeout = timeout
+        # Process-wide, so every client instance shares the same lane budget.
+        self.scheduler = default_scheduler()
+        self.lane = lane
+        self.breaker = breaker("bigcommerce")
 
         self.session = requests.Session()
         self.session.headers.update(
@@ -92,30 +111,22 @@ class BigCommerceClient:
 
         _LOG.debug("BC client init → base_url=%s", self.base_url)
 
-    def _customer_token(self) -> Optional[str]:
-        now = datetime.now(timezone.utc)
-        if self._cached_customer_token and self._token_expires_at and now < self._token_expires_at:
-            return self._cached_customer_token
-
-        endpoint = "/storefront/api-token"
-        expires_at = now + timedelta(hours=23)
-        self._token_expires_at = expires_at
-
+    def _mint_customer_token(self, expires_at: datetime) -> Optional[str]:
         payload = {
             "channel_id": self.channel_id,
             "expires_at": int(expires_at.timestamp())
         }
 
-        data = self._request("POST", endpoint, json=payload)
+        data = self._request("POST", "/storefront/api-token", json=payload)
         token = (data or {}).get("data", {}).get("token")
 
-        if token:
-            self._cached_customer_token = token
-        else:
+        if not token:
             _LOG.error("No JWT received (payload=%s)", _summarize(data))
-
         return token
 
+    def _customer_token(self) -> Optional[str]:
+        return self.tokens.get()
+
     def _request(
         self,
         method: str,
@@ -135,42 +146,65 @@ class BigCommerceClient:
         if params:
             url += "?" + urllib.parse.urlencode(params, doseq=True)
 
-        req_id = uuid.uuid4().hex
-        start = datetime.now()
+        req_id = next(_REQ_IDS)
+        start = time.perf_counter()
 
         headers = {**(extra_headers or {})}
 
-        _LOG.info("%s %s | id=%s", method, url, req_id)
+        if _LOG.isEnabledFor(logging.INFO) and sampled():
+            _LOG.info("%s %s | id=%s", method, url, req_id)
+
+        request_metrics.check_budget()
+        if not self.breaker.allow():
+            _LOG.warning("Circuit open → skipping %s %s | id=%s", method, url, req_id)
+            return None
 
+        nbytes = 0
+        ok, upstream = True, 0.0
         try:
-            resp = self.session.request(
-                method,
-                url,
-                json=json,
-                timeout=self.timeout,
-                headers=headers or None,
-            )
+            with self.scheduler.slot(self.lane):
+                sent = time.perf_counter()
+                try:
+                    resp = self.session.request(
+                        method,
+                        url,
+                        json=json,
+                        timeout=self.timeout,
+                        headers=headers or None,
+                    )
+                finally:
+                    upstream = time.perf_counter() - sent
+            nbytes = len(resp.content)
             resp.raise_for_status()
-            elapsed = (datetime.now() - start).total_seconds()
+            elapsed = time.perf_counter() - start
 
             try:
-                body = resp.json()
-            except json.JSONDecodeError:
+                body = decode_response(resp)
+            except ValueError:
+                ok = False
                 _LOG.error("Non-JSON response id=%s → %s…", req_id, resp.text[:200])
                 return None
 
-            _LOG.debug(
-                "%s %s | %s %.2fs | body=%s",
-                method,
-                url,
-                resp.status_code,
-                elapsed,
-                _summarize(body),
-            )
+            if _LOG.isEnabledFor(logging.DEBUG):
+                _LOG.debug(
+                    "%s %s | %s %.2fs | body=%s",
+                    method,
+                    url,
+                    resp.status_code,
+                    elapsed,
+                    _summarize(body),
+                )
             return body
         except requests.RequestException as exc:
+            ok = not is_upstream_failure(exc)
             _LOG.error("HTTP fail id=%s → %s", req_id, exc)
             return None
+        finally:
+            self.breaker.record(ok, upstream)
+            request_metrics.record(
+                "rest", request_metrics.call_signature(method, url, json),
+                nbytes, time.perf_counter() - start,
+            )
 
     def rest(
         self,
@@ -193,9 +227,37 @@ class BigCommerceClient:
     def make_request(self, method: str, endpoint: str, **kw):
         return self.rest(endpoint, method, **kw)
 
+    def _gql_payload(
+        self,
+        query: Union[str, GqlDocument],
+        variables: Optional[Dict[str, Any]],
+        *,
+        full: bool = False,
+    ) -> Dict[str, Any]:
+        if not isinstance(query, GqlDocument):
+            return {"query": query, "variables": variables or {}}
+
+        payload: Dict[str, Any] = {"operationName": query.name, "variables": variables or {}}
+        if not self.persisted_queries:
+            payload["query"] = query.query
+            return payload
+
+        payload["extensions"] = {"persistedQuery": {"version": 1, "sha256Hash": query.sha256}}
+        if full or query.sha256 not in self._persisted_hashes:
+            payload["query"] = query.query
+        return payload
+
+    @staticmethod
+    def _persisted_miss(body: Dict[str, Any]) -> bool:
+        return any(
+            "PersistedQueryNotFound" in str(err.get("message", ""))
+            or (err.get("extensions") or {}).get("code") == "PERSISTED_QUERY_NOT_FOUND"
+            for err in body.get("errors") or []
+        )
+
     def graphql(
         self,
-        query: str,
+        query: Union[str, GqlDocument],
         *,
         variables: Optional[Dict[str, Any]] = None,
         admin: bool = False,
@@ -210,28 +272,72 @@ class BigCommerceClient:
         else:
             url = self._STORE_GQL_PUBLIC.format(hash=self.store_hash)
 
-        headers = {
-            "Accept-Language": locale,
-            "Authorization": f"Bearer {self._customer_token()}",
-        }
+        headers = {"Accept-Language": locale}
+        if not admin:
+            # Admin calls authenticate with the session's X-Auth-Token.
+            headers["Authorization"] = f"Bearer {self._customer_token()}"
+
+        payload = self._gql_payload(query, variables)
+        req_id = next(_REQ_IDS)
+        _LOG.debug("GraphQL → %s | op=%s id=%s", url, payload.get("operationName"), req_id)
 
-        payload = {"query": query, "variables": variables or {}}
-        req_id = uuid.uuid4().hex
-        _LOG.debug("GraphQL → %s | id=%s", url, req_id)
+        request_metrics.check_budget()
+        if not self.breaker.allow():
+            _LOG.warning("Circuit open → skipping GraphQL %s | id=%s", url, req_id)
+            return None
 
+        start = time.perf_counter()
+        nbytes = 0
+        ok, upstream = True, 0.0
         try:
-            resp = self.session.post(
-                url, json=payload, headers=headers, timeout=self.timeout
-            )
+            with self.scheduler.slot(self.lane):
+                sent = time.perf_counter()
+                try:
+                    resp = self.session.post(
+                        url, json=payload, headers=headers, timeout=self.timeout
+                    )
+                finally:
+                    upstream = time.perf_counter() - sent
+            nbytes = len(resp.content)
             resp.raise_for_status()
-            body = resp.json()
+            body = decode_response(resp)
+
+            if "query" not in payload and self._persisted_miss(body):
+                _LOG.debug("GraphQL persisted miss id=%s → resending document", req_id)
+                with self.scheduler.slot(self.lane):
+                    resp = self.session.post(
+                        url,
+                        json=self._gql_payload(query, variables, full=True),
+                        headers=headers,
+                        timeout=self.timeout,
+                    )
+                resp.raise_for_status()
+                body = decode_response(resp)
 
             if body.get("errors"):
                 _LOG.error("GraphQL errors id=%s → %s", req_id, body["errors"])
                 return None
 
-            _LOG.debug("GraphQL OK id=%s → %s", req_id, _summarize(body))
+            if isinstance(query, GqlDocument) and self.persisted_queries:
+                self._persisted_hashes.add(query.sha256)
+
+            if _LOG.isEnabledFor(logging.DEBUG):
+                _LOG.debug("GraphQL OK id=%s → %s", req_id, _summarize(body))
             return body
         except requests.RequestException as exc:
+            ok = not is_upstream_failure(exc)
             _LOG.error("GraphQL HTTP fail id=%s → %s", req_id, exc)
-            return None
\ No newline at end of file
+            return None
+        except ValueError as exc:
+            ok = False
+            _LOG.error("GraphQL non-JSON response id=%s → %s", req_id, exc)
+            return None
+        finally:
+            self.breaker.record(ok, upstream)
+            request_metrics.record(
+                "graphql",
+                request_metrics.call_signature(
+                    "POST", url, (payload.get("operationName") or payload.get("query"), variables)
+                ),
+                nbytes, time.perf_counter() - start,
+            )
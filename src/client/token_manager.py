@@ -0,0 +1,107 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from src.utils.logger import setup_logging
+
+_LOG = setup_logging(__name__)
+
+
+class CustomerTokenManager:
+    """
+    Storefront token holder with single-flight minting.
+    A timer re-mints `refresh_margin` before expiry so callers normally
+    never wait; only a cold start (or a failed refresh) blocks, and then
+    concurrent callers share the one in-flight mint.
+    """
+
+    def __init__(
+        self,
+        mint: Callable[[datetime], Optional[str]],
+        *,
+        lifetime: timedelta = timedelta(hours=23),
+        refresh_margin: timedelta = timedelta(minutes=30),
+        background: bool = True,
+    ) -> None:
+        self._mint = mint
+        self.lifetime = lifetime
+        self.refresh_margin = refresh_margin
+        self.background = background
+
+        self._token: Optional[str] = None
+        self._expires_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    @property
+    def expires_at(self) -> Optional[datetime]:
+        return self._expires_at
+
+    def _valid(self, now: datetime) -> bool:
+        return bool(self._token and self._expires_at and now < self._expires_at)
+
+    def get(self) -> Optional[str]:
+        if self._valid(datetime.now(timezone.utc)):
+            return self._token
+        with self._lock:
+            # Another caller may have minted while we waited on the lock.
+            if self._valid(datetime.now(timezone.utc)):
+                return self._token
+            return self._refresh_locked()
+
+    async def aget(self) -> Optional[str]:
+        if self._valid(datetime.now(timezone.utc)):
+            return self._token
+        return await asyncio.to_thread(self.get)
+
+    def refresh(self) -> Optional[str]:
+        with self._lock:
+            return self._refresh_locked()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._token = None
+            self._expires_at = None
+
+    def close(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _refresh_locked(self) -> Optional[str]:
+        expires_at = datetime.now(timezone.utc) + self.lifetime
+        try:
+            token = self._mint(expires_at)
+        except Exception as exc:
+            _LOG.error("Customer token mint failed → %s", exc)
+            token = None
+
+        if not token:
+            # Keep a still-valid previous token; never extend expiry on failure.
+            return self._token if self._valid(datetime.now(timezone.utc)) else None
+
+        self._token = token
+        self._expires_at = expires_at
+        self._schedule(expires_at)
+        return token
+
+    def _schedule(self, expires_at: datetime) -> None:
+        if not self.background:
+            return
+        self.close()
+        delay = (expires_at - self.refresh_margin - datetime.now(timezone.utc)).total_seconds()
+        self._timer = threading.Timer(max(delay, 0.0), self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_refresh(self) -> None:
+        _LOG.debug("Customer token pre-refresh")
+        with self._lock:
+            previous = self._expires_at
+            self._refresh_locked()
+            if self._expires_at == previous and self._valid(datetime.now(timezone.utc)):
+                _LOG.warning("Customer token pre-refresh failed; retrying in 60s")
+                self._timer = threading.Timer(60.0, self._background_refresh)
+                self._timer.daemon = True
+                self._timer.start()
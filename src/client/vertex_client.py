@@ -1,21 +1,34 @@
 import html
 
+import contextvars
 import random
 import re
 import time
-from bs4 import BeautifulSoup
-from typing import Dict, List, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import requests
 from requests import Response
 
 from src.config import settings
+from src.utils import request_metrics
+from src.utils.circuit_breaker import CircuitBreaker, breaker
+from src.utils.cpu_executor import CpuExecutor, default_executor
+from src.utils.fast_json import decode_response
+from src.utils.html_text import prompt_text
 from src.utils.logger import setup_logging
+from src.utils.token_accounting import (OUTPUT_TOKENS_PER_LANGUAGE, default_controller, default_ledger,
+                                        estimate_cost, estimate_tokens, usage_from_response)
 
 _LOG = setup_logging()
 
+# Upper bound for the plain-text features fed into a generation prompt
+# (≈6,000 chars); longer descriptions lose their tail, see README.
+_FEATURES_TOKEN_BUDGET = 1500
+
+
 def _strip_html(raw: str) -> str:
-        return BeautifulSoup(raw, "html.parser").get_text(" ", strip=True)
+    return prompt_text(raw, _FEATURES_TOKEN_BUDGET)
 
 
 def _post_with_retries(
@@ -23,22 +36,38 @@ def _post_with_retries(
     headers: Dict[str, str],
     payload: Dict,
     *,
+    circuit: Optional[CircuitBreaker] = None,
     max_retries: int = 5,
     base_backoff: float = 1.0,
 ) -> Response:
+    """
+    POST with exponential backoff on 429. Every attempt is recorded on
+    `circuit`, so a 429 storm trips it after a few calls, and the retry
+    loop gives up as soon as the circuit no longer allows a call.
+    """
     for attempt in range(max_retries + 1):
-        resp = requests.post(url, headers=headers, json=payload, timeout=90)
+        start = time.perf_counter()
+        try:
+            resp = requests.post(url, headers=headers, json=payload, timeout=90)
+        except Exception:
+            if circuit is not None:
+                circuit.record(False, time.perf_counter() - start)
+            raise
+        if circuit is not None:
+            circuit.record(resp.status_code != 429 and resp.status_code < 500, time.perf_counter() - start)
         if resp.status_code != 429:
             resp.raise_for_status()
             return resp
 
         if attempt == max_retries:
             resp.raise_for_status()
+        if circuit is not None and not circuit.allow():
+            _LOG.warning("Vertex 429 – circuit %s open, not retrying", circuit.name)
+            resp.raise_for_status()
         sleep = base_backoff * (2**attempt) + random.random()
         _LOG.warning("Vertex 429 – retry %s in %.2fs", attempt + 1, sleep)
         time.sleep(sleep)
-        return None
-    return None
+    return resp
 
 def _build_generation_prompt(name: str, features: str, langs: List[str]) -> str:
     lang_list = ", ".join(langs)
@@ -60,48 +89,98 @@ def _build_translation_prompt(name: str, html_desc: str, target: List[str]) -> s
     )
 
 
+def _build_segment_prompt(segments: List[str], target: List[str]) -> str:
+    langs = ", ".join(target)
+    numbered = "\n".join(f"<<{i}>> {seg}" for i, seg in enumerate(segments, 1))
+    return (
+        f"Translate each numbered product-copy segment into: {langs}. "
+        "Keep HTML tags and entities intact and do not merge or split segments. "
+        "For each language return a block starting with `=== [LANG]` followed by "
+        "one line per segment in the form `<<n>> translation`.\n\n"
+        f"{numbered}"
+    )
+
+
+_LANG_BLOCK_RE = re.compile(r"===\s*([A-Za-z]{2})\s*")
+_SEGMENT_LANG_RE = re.compile(r"===\s*\[?([A-Za-z]{2,3}(?:[-_][A-Za-z0-9]+)?)\]?\s*")
+_SEGMENT_RE = re.compile(r"<<(\d+)>>\s*(.*?)\s*(?=<<\d+>>|\Z)", re.S)
+_H3_RE = re.compile(r"<h3>(.*?)</h3>", re.I)
+
+
 def _parse_vertex_output(text: str) -> Dict[str, Dict[str, str]]:
     out: Dict[str, Dict[str, str]] = {}
-    parts = re.split(r"===\s*([A-Za-z]{2})\s*", text)
+    parts = _LANG_BLOCK_RE.split(text)
     it = iter(parts[1:])  # skip first empty
     for lang, block in zip(it, it):
         block = block.strip()
-        h3 = re.search(r"<h3>(.*?)</h3>", block, re.I)
+        h3 = _H3_RE.search(block)
         name = html.unescape(h3.group(1).split(":")[0].strip()) if h3 else ""
         out[lang.lower()] = {"product_name": name, "description": block}
     return out
 
-def generate_multilingual_descriptions(
-    *,
-    product_id: str,
-    name: str,
-    features: str,
-    input_language: str,
-    target_languages: List[str],
-    description_html: str | None = None,
-    return_error: bool = False,
-) -> Dict[str, Dict[str, str]] | Tuple[Dict[str, Dict[str, str]], Optional[str]]:
-    if not settings.VERTEX_API_KEY or not settings.VERTEX_MODEL_ID:
-        err = "missing_creds"
-        _LOG.error("Vertex creds missing")
-        return ({}, err) if return_error else {}
 
-    languages = [input_language] + [l for l in target_languages if l != input_language]
+def _parse_segment_output(text: str, count: int) -> Dict[str, List[str]]:
+    """{lang: [segment translations]}; languages missing any segment are dropped."""
+    out: Dict[str, List[str]] = {}
+    parts = _SEGMENT_LANG_RE.split(text)
+    it = iter(parts[1:])
+    for lang, block in zip(it, it):
+        found = {int(n): seg for n, seg in _SEGMENT_RE.findall(block)}
+        if all(i in found for i in range(1, count + 1)):
+            out[lang.lower()] = [found[i] for i in range(1, count + 1)]
+    return out
+
+
+def _build_prompt(job: Dict[str, Any]) -> str:
+    """Picklable prompt builder; `job` carries the generate_* keyword args."""
+    input_language = job["input_language"]
+    target_languages = job["target_languages"]
+    if job.get("description_html"):
+        return _build_translation_prompt(job["name"], job["description_html"], target_languages)
+    return _build_generation_prompt(job["name"], _strip_html(job["features"]),
+                                    _prompt_languages(input_language, target_languages))
 
-    if description_html:
-        prompt = _build_translation_prompt(name, description_html, target_languages)
-    else:
-        prompt = _build_generation_prompt(name, _strip_html(features), languages)
 
-    url = (
+def _prompt_languages(input_language: str, target_languages: List[str]) -> List[str]:
+    return [input_language] + [l for l in target_languages if l != input_language]
+
+
+def _job_languages(job: Dict[str, Any]) -> List[str]:
+    """Language blocks the prompt for `job` asks Vertex to write."""
+    if job.get("description_html"):
+        return list(job["target_languages"])
+    return _prompt_languages(job["input_language"], job["target_languages"])
+
+
+def _vertex_url() -> str:
+    return (
         f"https://generativelanguage.googleapis.com/v1beta/models/"
         f"{settings.VERTEX_MODEL_ID}:generateContent?key={settings.VERTEX_API_KEY}"
     )
+
+
+def _request_text(product_id: str, prompt: str, languages: Sequence[str] = ()) -> Tuple[str, Optional[str]]:
+    """Vertex round trip only; returns (raw text, error)."""
     payload = {"contents": [{"parts": [{"text": prompt}]}]}
+    request_metrics.check_budget()
+    default_controller().wait(estimate_tokens(prompt) + len(languages) * OUTPUT_TOKENS_PER_LANGUAGE)
+    circuit = breaker("vertex")
+    if not circuit.allow():
+        _LOG.warning("Vertex circuit open → skipping pid=%s", product_id)
+        return "", "circuit_open"
 
+    start = time.perf_counter()
+    nbytes = 0
     try:
-        resp = _post_with_retries(url, {"Content-Type": "application/json"}, payload)
-        data = resp.json()
+        resp = _post_with_retries(_vertex_url(), {"Content-Type": "application/json"}, payload,
+                                  circuit=circuit)
+        nbytes = len(resp.content)
+        data = decode_response(resp)
+        prompt_tokens, output_tokens = usage_from_response(data)
+        default_ledger().record(
+            settings.VERTEX_MODEL_ID, prompt_tokens, output_tokens, time.perf_counter() - start,
+            product_id=product_id, languages=languages,
+        )
         text = (
             data.get("candidates", [{}])[0]
             .get("content", {})
@@ -110,14 +189,111 @@ def generate_multilingual_descriptions(
         ) or ""
 
         if not text.strip():
-            err = "empty_response"
             _LOG.error("Vertex empty response pid=%s | raw=%s", product_id, data)
-            return ({}, err) if return_error else {}
-
-        result = _parse_vertex_output(text)
-        return (result, None) if return_error else result
+            return "", "empty_response"
+        return text, None
 
     except Exception as exc:
         err = str(exc)
         _LOG.error("Vertex exception pid=%s → %s", product_id, err)
-        return ({}, err) if return_error else {}
\ No newline at end of file
+        return "", err
+    finally:
+        request_metrics.record(
+            "vertex", request_metrics.call_signature("POST", "vertex", prompt),
+            nbytes, time.perf_counter() - start,
+        )
+
+
+def generate_multilingual_descriptions(
+    *,
+    product_id: str,
+    name: str,
+    features: str,
+    input_language: str,
+    target_languages: List[str],
+    description_html: str | None = None,
+    return_error: bool = False,
+) -> Dict[str, Dict[str, str]] | Tuple[Dict[str, Dict[str, str]], Optional[str]]:
+    if not settings.VERTEX_API_KEY or not settings.VERTEX_MODEL_ID:
+        err = "missing_creds"
+        _LOG.error("Vertex creds missing")
+        return ({}, err) if return_error else {}
+
+    job = {
+        "name": name,
+        "features": features,
+        "input_language": input_language,
+        "target_languages": target_languages,
+        "description_html": description_html,
+    }
+    text, err = _request_text(product_id, _build_prompt(job), _job_languages(job))
+    if err:
+        return ({}, err) if return_error else {}
+
+    result = _parse_vertex_output(text)
+    return (result, None) if return_error else result
+
+
+def translate_segments(
+    segments: List[str],
+    target_languages: List[str],
+    *,
+    label: str = "segments",
+) -> Tuple[Dict[str, List[str]], Optional[str]]:
+    """One Vertex call translating `segments` into every target; returns ({lang: [...]}, error)."""
+    if not settings.VERTEX_API_KEY or not settings.VERTEX_MODEL_ID:
+        _LOG.error("Vertex creds missing")
+        return {}, "missing_creds"
+    text, err = _request_text(label, _build_segment_prompt(segments, target_languages), target_languages)
+    if err:
+        return {}, err
+    return _parse_segment_output(text, len(segments)), None
+
+
+def generate_multilingual_descriptions_bulk(
+    jobs: List[Dict[str, Any]],
+    *,
+    executor: Optional[CpuExecutor] = None,
+    io_workers: Optional[int] = None,
+) -> Dict[str, Tuple[Dict[str, Dict[str, str]], Optional[str]]]:
+    """
+    Bulk variant: each job holds `product_id` plus the keyword args of
+    `generate_multilingual_descriptions`. Prompt building and output
+    parsing run in chunked batches on `executor` (process pool when
+    configured), Vertex calls on a thread pool sized by the throughput
+    controller unless `io_workers` is given.
+    Returns {product_id: (translations, error)}.
+    """
+    if not jobs:
+        return {}
+    if not settings.VERTEX_API_KEY or not settings.VERTEX_MODEL_ID:
+        _LOG.error("Vertex creds missing")
+        return {str(j["product_id"]): ({}, "missing_creds") for j in jobs}
+
+    executor = executor or default_executor()
+    prompts = executor.map(_build_prompt, jobs)
+
+    # One context copy per call so request-scoped accounting follows the threads.
+    contexts = [contextvars.copy_context() for _ in jobs]
+    languages = [_job_languages(j) for j in jobs]
+    io_workers = io_workers or default_controller().workers(4)
+    with ThreadPoolExecutor(max_workers=max(1, io_workers)) as pool:
+        replies = list(pool.map(
+            lambda ctx, pid, prompt, langs: ctx.run(_request_text, pid, prompt, langs),
+            contexts, [str(j["product_id"]) for j in jobs], prompts, languages,
+        ))
+
+    texts = [text for text, err in replies if not err]
+    parsed = iter(executor.map(_parse_vertex_output, texts))
+
+    out: Dict[str, Tuple[Dict[str, Dict[str, str]], Optional[str]]] = {}
+    for job, (_, err) in zip(jobs, replies):
+        out[str(job["product_id"])] = ({}, err) if err else (next(parsed), None)
+    return out
+
+
+def estimate_bulk_cost(jobs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Dry run of `generate_multilingual_descriptions_bulk`: prompts are built, nothing is sent."""
+    if not jobs:
+        return estimate_cost([], 0)
+    return estimate_cost((_build_prompt(j) for j in jobs), len(_job_languages(jobs[0])))
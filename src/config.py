@@ -10,10 +10,49 @@ class _Settings(BaseSettings):
     BC_ACCESS_TOKEN: str
     BC_CHANNEL_ID: int = 1
     BC_ENV: str = "production"
+    BC_GQL_PERSISTED_QUERIES: bool = False
 
     VERTEX_API_KEY: str
     VERTEX_MODEL_ID: str
-    DEBUG_MODE: bool = True
+    DEBUG_MODE: bool = False
+    LOG_FORMAT: str = "text"
+    LOG_SAMPLE_RATE: float = 1.0
+
+    CACHE_TTL_SECONDS: float = 300.0
+    MAX_SEEK_PAGE: int = 20
+    BC_WEBHOOK_SECRET: str = ""
+    BC_WEBHOOK_ACCEPT_RAW_SECRET: bool = False
+    WEBHOOK_DEBOUNCE_SECONDS: float = 2.0
+
+    CPU_POOL_MODE: str = "inline"
+    CPU_POOL_WORKERS: int = 0
+    CPU_POOL_CHUNKSIZE: int = 8
+    CPU_POOL_MIN_ITEMS: int = 16
+
+    OUTBOX_PATH: str = ""
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_FLUSH_INTERVAL: float = 1.0
+    OUTBOX_MAX_ATTEMPTS: int = 8
+
+    TM_PATH: str = ""
+
+    UPSTREAM_CALL_BUDGET: int = 0
+    UPSTREAM_BUDGET_MODE: str = "warn"
+
+    LANE_CAPACITY: int = 8
+    LANE_INTERACTIVE_RESERVED: int = 2
+
+    BREAKER_FAILURE_RATE: float = 0.5
+    BREAKER_MIN_CALLS: int = 10
+    BREAKER_WINDOW: int = 20
+    BREAKER_OPEN_SECONDS: float = 30.0
+    BREAKER_SLOW_CALL_SECONDS: float = 5.0
+    VERTEX_BREAKER_SLOW_CALL_SECONDS: float = 60.0
+
+    VERTEX_TPM_LIMIT: int = 0
+    VERTEX_MAX_CONCURRENCY: int = 16
+    VERTEX_PRICE_INPUT_PER_1M: float = 0.0375
+    VERTEX_PRICE_OUTPUT_PER_1M: float = 0.15
     BASE_DIR: ClassVar[Path] = Path(__file__).resolve().parent.parent
 
     model_config = SettingsConfigDict(
@@ -31,6 +70,7 @@ def _cached() -> "_Settings":
 settings = _cached()
 
 BC_ENV = settings.BC_ENV
+BC_GQL_PERSISTED_QUERIES = settings.BC_GQL_PERSISTED_QUERIES
 DEBUG_MODE = settings.DEBUG_MODE
 BC_CHANNEL_ID = settings.BC_CHANNEL_ID
 BC_STORE_HASH = settings.BC_STORE_HASH
@@ -0,0 +1,521 @@
+"""
+Catalog-wide localization run, split across processes or hosts.
+
+Static sharding – every worker takes the product IDs with `id % N == i`:
+    python -m src.jobs.catalog_run run --shard 0/4 --report-dir reports/
+Lease queue – workers claim batches from a shared SQLite file:
+    python -m src.jobs.catalog_run seed  --queue work.db [--ids-file ids.txt]
+    python -m src.jobs.catalog_run run   --queue work.db
+Dry-run token / cost estimate before a run:
+    python -m src.jobs.catalog_run estimate --shard 0/1
+Local fan-out over N processes on one machine, then one merged report:
+    python -m src.jobs.catalog_run local --processes 4 --report-dir reports/
+    python -m src.jobs.catalog_run merge --report-dir reports/
+"""
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.utils.logger import setup_logging
+
+_LOG = setup_logging(__name__)
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """'i/N' with 0 <= i < N."""
+    try:
+        index, count = (int(x) for x in spec.split("/", 1))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"shard must look like i/N, got {spec!r}")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index out of range: {spec!r}")
+    return index, count
+
+
+def in_shard(product_id: int, index: int, count: int) -> bool:
+    return product_id % count == index
+
+
+def _chunks(ids: Iterable[int], size: int) -> Iterator[List[int]]:
+    chunk: List[int] = []
+    for pid in ids:
+        chunk.append(pid)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class LeaseQueue:
+    """
+    File-backed work queue. Workers claim batches under a lease; a worker
+    that dies simply lets its lease expire and another one picks it up.
+    Products whose outcome is not "ok" go back to pending after a backoff
+    (reusing `lease_until` as not-before) until `max_attempts`, then stay
+    "failed" with their last outcome. Only the current lease holder can
+    complete a row; late results from an expired lease are dropped.
+    """
+
+    def __init__(self, path: str | Path, *, max_attempts: int = 3, retry_delay: float = 60.0) -> None:
+        self.path = str(path)
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS work (
+                pid          INTEGER PRIMARY KEY,
+                status       TEXT    NOT NULL DEFAULT 'pending',
+                owner        TEXT,
+                lease_until  REAL    NOT NULL DEFAULT 0,
+                outcome      TEXT,
+                attempts     INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(work)")}
+        if "attempts" not in columns:  # queue files seeded before retries existed
+            self._db.execute("ALTER TABLE work ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+
+    def seed(self, product_ids: Iterable[int]) -> int:
+        before = self._db.total_changes
+        self._db.execute("BEGIN IMMEDIATE")
+        self._db.executemany(
+            "INSERT OR IGNORE INTO work (pid) VALUES (?)", ((pid,) for pid in product_ids)
+        )
+        self._db.execute("COMMIT")
+        return self._db.total_changes - before
+
+    def claim(self, owner: str, limit: int, lease_seconds: float = 600.0) -> List[int]:
+        now = time.time()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self._db.execute(
+                """
+                SELECT pid FROM work
+                WHERE (status = 'pending' AND lease_until <= ?) OR (status = 'leased' AND lease_until < ?)
+                ORDER BY pid LIMIT ?
+                """,
+                (now, now, limit),
+            ).fetchall()
+            ids = [r[0] for r in rows]
+            self._db.executemany(
+                "UPDATE work SET status = 'leased', owner = ?, lease_until = ? WHERE pid = ?",
+                ((owner, now + lease_seconds, pid) for pid in ids),
+            )
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return ids
+
+    def complete(self, owner: str, outcomes: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Records a batch claimed by `owner`; returns how many products were
+        done / retried / failed, and how many were stale (re-leased to
+        another worker after this lease expired).
+        """
+        now = time.time()
+        counts = {"done": 0, "retry": 0, "failed": 0, "stale": 0}
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            for outcome in outcomes:
+                pid = outcome["id"]
+                row = self._db.execute(
+                    "SELECT attempts FROM work WHERE pid = ? AND owner = ? AND status = 'leased'",
+                    (pid, owner),
+                ).fetchone()
+                if row is None:
+                    counts["stale"] += 1
+                    continue
+                attempts = row[0]
+                if outcome.get("status") == "ok":
+                    status, not_before = "done", 0.0
+                else:
+                    attempts += 1
+                    status = "pending" if attempts < self.max_attempts else "failed"
+                    not_before = now + self.retry_delay * attempts
+                counts["retry" if status == "pending" else status] += 1
+                self._db.execute(
+                    "UPDATE work SET status = ?, owner = NULL, lease_until = ?, outcome = ?, attempts = ? "
+                    "WHERE pid = ? AND owner = ? AND status = 'leased'",
+                    (status, not_before, json.dumps(outcome), attempts, pid, owner),
+                )
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return counts
+
+    def partials(self, product_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Last outcome of each of `product_ids` that came back partial."""
+        found = {}
+        for pid in product_ids:
+            row = self._db.execute("SELECT outcome FROM work WHERE pid = ?", (pid,)).fetchone()
+            outcome = json.loads(row[0]) if row and row[0] else None
+            if outcome and outcome.get("status") == "partial":
+                found[pid] = outcome
+        return found
+
+    def next_retry(self) -> Optional[float]:
+        """Seconds until the earliest backed-off product is claimable; None when none is waiting."""
+        (until,) = self._db.execute(
+            "SELECT MIN(lease_until) FROM work WHERE status = 'pending' AND lease_until > 0"
+        ).fetchone()
+        return None if until is None else max(0.0, until - time.time())
+
+    def outcomes(self) -> Iterator[Dict[str, Any]]:
+        for (outcome,) in self._db.execute("SELECT outcome FROM work WHERE outcome IS NOT NULL"):
+            yield json.loads(outcome)
+
+    def pending(self) -> int:
+        return self._db.execute(
+            "SELECT COUNT(*) FROM work WHERE status IN ('pending', 'leased')").fetchone()[0]
+
+    def failed(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM work WHERE status = 'failed'").fetchone()[0]
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def merge_outcomes(outcomes: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """One report out of any number of per-worker outcome streams (last write wins per id)."""
+    by_id = {o["id"]: o for o in outcomes}
+    report: Dict[str, Any] = {"products": len(by_id), "ok": 0, "partial": 0, "error": 0, "failures": []}
+    for pid in sorted(by_id):
+        outcome = by_id[pid]
+        report[outcome["status"]] = report.get(outcome["status"], 0) + 1
+        if outcome["status"] != "ok":
+            report["failures"].append(outcome)
+    return report
+
+
+def read_reports(report_dir: str | Path) -> Iterator[Dict[str, Any]]:
+    for path in sorted(Path(report_dir).glob("shard-*.jsonl")):
+        with path.open(encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _services():
+    # Clients are built per worker process, not at import time.
+    from src.api.locales import active_locales
+    from src.client.bc_client import BigCommerceClient
+    from src.config import settings
+    from src.operations.product_operations import ProductOperations
+    from src.services.product_multilang_service import ProductLocalizationService
+    from src.utils.priority_lanes import BULK
+
+    bc = BigCommerceClient(environment=settings.BC_ENV, debug=settings.DEBUG_MODE, lane=BULK)
+    return settings, active_locales, ProductOperations(bc), ProductLocalizationService(bc)
+
+
+def _wait_for_upstreams() -> None:
+    from src.utils.circuit_breaker import wait_until_closed
+
+    # Holding off here (before claiming) keeps leases free for healthier workers.
+    wait_until_closed(("bigcommerce", "vertex"))
+
+
+def _paced(ids: Iterable[int], every: int) -> Iterator[int]:
+    # The pipeline pulls IDs only when it starts a batch, so pausing here pauses it.
+    for n, pid in enumerate(ids):
+        if n % every == 0:
+            _wait_for_upstreams()
+        yield pid
+
+
+def _localize_batch(srv, pids, channel_id, targets, args, channel_locales=None) -> List[Dict[str, Any]]:
+    from src.services.generation_service import (compact_multichannel_outcome, compact_outcome,
+                                                 localize_products, localize_products_multichannel)
+
+    if channel_locales:
+        results = localize_products_multichannel(srv, pids, channel_id, channel_locales,
+                                                 args.base_language, args.locales, mode=args.mode)
+        return [compact_multichannel_outcome(pid, res) for pid, res in results.items()]
+    results = localize_products(srv, pids, channel_id, args.base_language, targets, mode=args.mode)
+    return [compact_outcome(pid, res) for pid, res in results.items()]
+
+
+def _language(code: str) -> str:
+    return code.split("-")[0].split("_")[0].lower()
+
+
+def _retry_scope(outcome: Dict[str, Any]) -> Dict[Any, List[str]]:
+    """Failed locales of a partial outcome, per channel (key None when single-channel)."""
+    if "channels" in outcome:
+        return {int(ch): o["failed_locales"] for ch, o in outcome["channels"].items()
+                if o.get("failed_locales")}
+    return {None: outcome.get("failed_locales") or []}
+
+
+def _merge_retry(previous: Dict[str, Any], retry: Dict[str, Any]) -> Dict[str, Any]:
+    """Folds the outcome of re-running `previous`'s failed locales into it."""
+    if retry.get("status") == "error":
+        return {**previous, "error": retry.get("error")}
+    merged = {k: v for k, v in previous.items() if k != "error"}
+    if "channels" in previous:
+        channels = {str(ch): o for ch, o in previous["channels"].items()}
+        for ch, o in (retry.get("channels") or {}).items():
+            channels[str(ch)] = _merge_retry(channels.get(str(ch), {"locales": []}), o)
+        ok = all(o["status"] == "ok" for o in channels.values())
+        merged.update(status="ok" if ok else "partial", channels=channels)
+        return merged
+    failed = retry.get("failed_locales") or []
+    merged.update(status="ok" if not failed else "partial", failed_locales=failed,
+                  locales=sorted(set(previous.get("locales") or []) | set(retry.get("locales") or [])))
+    return merged
+
+
+def _retry_partials(srv, partials: Dict[int, Dict[str, Any]], channel_id, args) -> List[Dict[str, Any]]:
+    """Re-runs only the failed locales (and channels) of partial outcomes, grouped by scope."""
+    from src.services.generation_service import (compact_multichannel_outcome, compact_outcome,
+                                                 localize_products, localize_products_multichannel)
+
+    groups: Dict[str, List[int]] = {}
+    for pid, outcome in partials.items():
+        groups.setdefault(json.dumps(_retry_scope(outcome), sort_keys=True), []).append(pid)
+
+    merged = []
+    for pids in groups.values():
+        scope = _retry_scope(partials[pids[0]])
+        if None in scope:
+            results = localize_products(srv, pids, channel_id, args.base_language, scope[None],
+                                        mode=args.mode)
+            outcomes = [compact_outcome(pid, res) for pid, res in results.items()]
+        else:
+            failed = {_language(loc) for locs in scope.values() for loc in locs}
+            targets = [l for l in args.locales if _language(l) in failed] if args.locales else None
+            results = localize_products_multichannel(srv, pids, channel_id, scope, args.base_language,
+                                                     targets, mode=args.mode)
+            outcomes = [compact_multichannel_outcome(pid, res) for pid, res in results.items()]
+        merged += [_merge_retry(partials[o["id"]], o) for o in outcomes]
+    return merged
+
+
+def cmd_seed(args) -> None:
+    settings, _, ops, _ = _services()
+    channel_id = args.channel_id or settings.BC_CHANNEL_ID
+    queue = LeaseQueue(args.queue)
+    if args.ids_file:
+        from src.services.generation_pipeline import iter_ids_file
+
+        with open(args.ids_file, encoding="utf-8") as fh:
+            added = queue.seed(iter_ids_file(fh))
+    else:
+        added = queue.seed(ops.get_compact_catalog(channel_id).ids)
+    _LOG.info("Seeded %s products into %s (pending=%s)", added, args.queue, queue.pending())
+    queue.close()
+
+
+def cmd_run(args) -> None:
+    from src.utils.token_accounting import default_ledger, job
+
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    with job(f"catalog_run:{owner}"):
+        _run(args, owner)
+    _LOG.info("Vertex usage %s → %s", owner, default_ledger().snapshot()["jobs"])
+
+
+def _run(args, owner: str) -> None:
+    from src.services.generation_service import vertex_targets
+
+    settings, active_locales, ops, srv = _services()
+    channel_id = args.channel_id or settings.BC_CHANNEL_ID
+    targets = vertex_targets(args.base_language, args.locales, active_locales(channel_id))
+    channel_locales = ({ch: active_locales(ch) for ch in dict.fromkeys([channel_id, *args.channel_ids])}
+                       if args.channel_ids else None)
+
+    if args.queue:
+        queue = LeaseQueue(args.queue, max_attempts=args.max_attempts, retry_delay=args.retry_delay)
+        while True:
+            _wait_for_upstreams()
+            pids = queue.claim(owner, args.batch_size, args.lease_seconds)
+            if not pids:
+                # Only backed-off retries left: wait for them rather than exit.
+                delay = queue.next_retry()
+                if delay is None:
+                    break
+                time.sleep(min(delay, args.retry_delay) + 0.05)
+                continue
+            partials = queue.partials(pids)
+            fresh = [pid for pid in pids if pid not in partials]
+            outcomes = _localize_batch(srv, fresh, channel_id, targets, args, channel_locales) if fresh else []
+            outcomes += _retry_partials(srv, partials, channel_id, args) if partials else []
+            counts = queue.complete(owner, outcomes)
+            _LOG.info("%s finished %s products %s (pending=%s)", owner, len(pids), counts, queue.pending())
+        queue.close()
+        return
+
+    from src.services.generation_pipeline import iter_ids_file, stream_outcomes
+
+    index, count = args.shard
+    report = Path(args.report_dir) / f"shard-{index}-of-{count}.jsonl"
+    report.parent.mkdir(parents=True, exist_ok=True)
+    with ExitStack() as stack:
+        fh = stack.enter_context(report.open("a", encoding="utf-8"))
+        source = (iter_ids_file(stack.enter_context(open(args.ids_file, encoding="utf-8")))
+                  if args.ids_file else iter(ops.get_compact_catalog(channel_id).ids))
+        ids = _paced((pid for pid in source if in_shard(pid, index, count)), args.batch_size)
+        outcomes = stream_outcomes(
+            srv, ids, channel_id, args.base_language,
+            args.locales if channel_locales else targets,
+            batch_size=args.batch_size, max_in_flight=args.in_flight,
+            mode=args.mode, channel_locales=channel_locales,
+        )
+        for n, outcome in enumerate(outcomes, 1):
+            fh.write(json.dumps(outcome) + "\n")
+            if n % args.batch_size == 0:
+                fh.flush()
+                _LOG.info("shard %s/%s finished %s products", index, count, n)
+
+
+def cmd_estimate(args) -> None:
+    """Dry run: builds the shard's prompts from live base copy and prices them; Vertex is not called."""
+    from src.client.vertex_client import estimate_bulk_cost
+    from src.services.generation_service import TRANSLATE, vertex_targets
+
+    settings, active_locales, ops, srv = _services()
+    channel_id = args.channel_id or settings.BC_CHANNEL_ID
+    targets = vertex_targets(args.base_language, args.locales, active_locales(channel_id))
+    index, count = args.shard
+    ids = (pid for pid in ops.get_compact_catalog(channel_id).ids if in_shard(pid, index, count))
+
+    totals: Dict[str, float] = {"calls": 0, "prompt_tokens": 0, "output_tokens": 0, "cost_usd": 0.0}
+    for pids in _chunks(ids, args.batch_size):
+        jobs = []
+        for item in srv.get_localized_products(channel_id, [args.base_language], pids,
+                                               fields=("name", "description")):
+            base = item["overrides"][0] if item["overrides"] else {}
+            description = base.get("description") or ""
+            jobs.append({
+                "product_id":       item["id"],
+                "name":             base.get("name") or item["name"],
+                "features":         description,
+                "input_language":   args.base_language,
+                "target_languages": targets,
+                # Upper bound: the translation memory only sends the misses.
+                "description_html": description if args.mode == TRANSLATE else None,
+            })
+        for key, value in estimate_bulk_cost(jobs).items():
+            totals[key] += value
+    totals["cost_usd"] = round(totals["cost_usd"], 4)
+    print(json.dumps({"shard": f"{index}/{count}", "languages": len(targets), **totals}, indent=2))
+
+
+def cmd_local(args) -> None:
+    """Runs `--processes` shard workers on this machine, then merges."""
+    base = [sys.executable, "-m", "src.jobs.catalog_run", "run",
+            "--report-dir", args.report_dir, "--batch-size", str(args.batch_size),
+            "--base-language", args.base_language, "--mode", args.mode]
+    if args.channel_id:
+        base += ["--channel-id", str(args.channel_id)]
+    if args.channel_ids:
+        base += ["--channel-ids", *map(str, args.channel_ids)]
+    if args.locales:
+        base += ["--locales", *args.locales]
+    if args.ids_file:
+        base += ["--ids-file", args.ids_file]
+    base += ["--in-flight", str(args.in_flight)]
+    procs = [
+        subprocess.Popen(base + ["--shard", f"{i}/{args.processes}"])
+        for i in range(args.processes)
+    ]
+    codes = [p.wait() for p in procs]
+    if any(codes):
+        _LOG.error("Shard exit codes: %s", codes)
+    cmd_merge(args)
+
+
+def cmd_merge(args) -> None:
+    if getattr(args, "queue", None):
+        queue = LeaseQueue(args.queue)
+        report = merge_outcomes(queue.outcomes())
+        report["pending"] = queue.pending()
+        report["failed_after_retries"] = queue.failed()
+        queue.close()
+    else:
+        report = merge_outcomes(read_reports(args.report_dir))
+    out = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(out, encoding="utf-8")
+    print(out)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="catalog_run", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def common(p, *, work=True):
+        p.add_argument("--queue", help="SQLite lease-queue file shared by all workers")
+        p.add_argument("--report-dir", default="reports")
+        p.add_argument("--output", help="write the merged report here as well")
+        if work:
+            p.add_argument("--channel-id", type=int)
+            p.add_argument("--channel-ids", type=int, nargs="*", default=[],
+                           help="also write every result to these channels (generated once)")
+            p.add_argument("--base-language", default="en")
+            p.add_argument("--locales", nargs="*", help="target locales (default: active)")
+            p.add_argument("--batch-size", type=int, default=25)
+            p.add_argument("--mode", choices=("generate", "translate"), default="generate",
+                           help="translate reuses the translation memory (TM_PATH)")
+            p.add_argument("--lease-seconds", type=float, default=600.0)
+            p.add_argument("--max-attempts", type=int, default=3,
+                           help="lease queue: tries per product before it is marked failed")
+            p.add_argument("--retry-delay", type=float, default=60.0,
+                           help="lease queue: backoff step in seconds between tries")
+
+    p = sub.add_parser("seed", help="fill the lease queue with the channel catalog")
+    common(p)
+    p.add_argument("--ids-file", help="seed these product IDs (one per line) instead of the catalog")
+    p.set_defaults(func=cmd_seed)
+
+    p = sub.add_parser("run", help="process one shard or drain the lease queue")
+    common(p)
+    p.add_argument("--shard", type=parse_shard, default=(0, 1), help="i/N (0-based)")
+    p.add_argument("--ids-file", help="product IDs to process (one per line) instead of the catalog")
+    p.add_argument("--in-flight", type=int, default=2, help="batches generated concurrently")
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("estimate", help="dry-run token and cost estimate for a shard")
+    common(p)
+    p.add_argument("--shard", type=parse_shard, default=(0, 1), help="i/N (0-based)")
+    p.set_defaults(func=cmd_estimate)
+
+    p = sub.add_parser("local", help="run N shard processes here and merge")
+    common(p)
+    p.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--ids-file", help="product IDs to process (one per line) instead of the catalog")
+    p.add_argument("--in-flight", type=int, default=2, help="batches generated concurrently per process")
+    p.set_defaults(func=cmd_local)
+
+    p = sub.add_parser("merge", help="merge shard reports (or queue outcomes) into one")
+    common(p, work=False)
+    p.set_defaults(func=cmd_merge)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    if args.command == "seed" and not args.queue:
+        build_parser().error("seed requires --queue")
+    if args.command == "run" and args.queue and args.ids_file:
+        build_parser().error("--ids-file is not read with --queue; seed the queue with `seed --queue ... --ids-file ...`")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
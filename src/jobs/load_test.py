@@ -0,0 +1,481 @@
+"""
+In-process load test of the FastAPI app against local BigCommerce / Vertex
+stand-ins, with a latency regression gate.
+
+Run every scenario at 16 concurrent requests and print the results:
+    python -m src.jobs.load_test run --concurrency 16 --requests 200
+Gate against a stored baseline (exit code 1 on regression):
+    python -m src.jobs.load_test run --baseline loadtest/baseline.json --tolerance 0.25
+Record a new baseline from this machine:
+    python -m src.jobs.load_test run --update-baseline loadtest/baseline.json
+
+Requests go straight into the ASGI app (no sockets). Upstream HTTP is
+answered by the stand-ins after a configurable sleep, so a blocking call
+made on the event loop shows up as loop lag and tail latency.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# Nothing from src/ is imported at module level: src.config builds the
+# settings on import, which must happen after the stand-in environment is set.
+_LOG = logging.getLogger(__name__)
+
+_STANDIN_ENV = {
+    "BC_STORE_HASH": "loadtest",
+    "BC_ACCESS_TOKEN": "loadtest",
+    "CLIENT_ID": "loadtest",
+    "CLIENT_SECRET": "loadtest",
+    "VERTEX_API_KEY": "loadtest",
+    "VERTEX_MODEL_ID": "loadtest-model",
+    "OUTBOX_PATH": "",
+    "LOG_SAMPLE_RATE": "0",
+}
+
+
+# ─────────────────────────── Upstream stand-ins ───────────────────
+class Upstreams:
+    """
+    Serves the BigCommerce REST/GraphQL and Gemini calls the app makes,
+    from a generated catalog, after `bc_latency` / `vertex_latency` seconds.
+    """
+
+    def __init__(
+        self,
+        *,
+        products: int = 500,
+        locales: Tuple[str, ...] = ("en", "es", "fr", "de"),
+        bc_latency: float = 0.02,
+        vertex_latency: float = 0.2,
+    ) -> None:
+        self.products = products
+        self.locales = locales
+        self.bc_latency = bc_latency
+        self.vertex_latency = vertex_latency
+        self.calls: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def product(self, pid: int) -> Dict[str, Any]:
+        return {
+            "id": pid,
+            "name": f"Product {pid}",
+            "description": f"<p>Product {pid} description.</p><ul><li>Care: wash cold</li></ul>",
+            "price": 10.0 + pid % 90,
+            "categories": [pid % 7 + 1],
+        }
+
+    def handle(self, method: str, url: str, body: Optional[bytes]) -> Tuple[int, Any]:
+        parsed = urllib.parse.urlsplit(url)
+        payload = json.loads(body) if body else {}
+        if "generativelanguage" in parsed.netloc:
+            return self._count("vertex", self.vertex_latency, self._vertex(payload))
+        if parsed.path.endswith("/graphql"):
+            return self._count("graphql", self.bc_latency, self._graphql(payload))
+        if parsed.path.endswith("/catalog/products"):
+            return self._count("rest", self.bc_latency, self._catalog(parsed.query))
+        if parsed.path.endswith("/storefront/api-token"):
+            return self._count("rest", self.bc_latency, (200, {"data": {"token": "loadtest-jwt"}}))
+        return self._count("unknown", 0.0, (404, {"title": "not found"}))
+
+    def _count(self, kind: str, latency: float, reply: Tuple[int, Any]) -> Tuple[int, Any]:
+        with self._lock:
+            self.calls[kind] += 1
+        if latency:
+            time.sleep(latency)
+        return reply
+
+    # BigCommerce REST
+    def _catalog(self, query: str) -> Tuple[int, Any]:
+        params = urllib.parse.parse_qs(query)
+        if "id:in" in params:
+            ids = [int(x) for x in params["id:in"][0].split(",") if x]
+            return 200, {"data": [self.product(pid) for pid in ids if 1 <= pid <= self.products]}
+        limit = int(params.get("limit", ["250"])[0])
+        page = int(params.get("page", ["1"])[0])
+        start = (page - 1) * limit + 1
+        ids = range(start, min(start + limit, self.products + 1))
+        return 200, {"data": [self.product(pid) for pid in ids]}
+
+    # BigCommerce GraphQL
+    def _graphql(self, payload: Dict[str, Any]) -> Tuple[int, Any]:
+        op = payload.get("operationName") or ""
+        variables = payload.get("variables") or {}
+        if op == "GetLocales":
+            edges = [{"node": {"code": loc, "status": "ACTIVE", "isDefault": i == 0}}
+                     for i, loc in enumerate(self.locales)]
+            return 200, {"data": {"store": {"locales": {"edges": edges}}}}
+        if op.startswith("GetLocalizedProduct"):
+            pid = _entity(variables.get("productId"))
+            node = self._node(pid)
+            node["overridesForLocale"] = self._override(pid, variables.get("locale", "en"))
+            images = {"edges": [{"node": {"urlStandard": f"https://cdn.example/{pid}.jpg"}}]}
+            return 200, {"data": {"store": {"products": {"edges": [{"node": node}]},
+                                            "product": {"images": images}}}}
+        if op.startswith("ProductsPage"):
+            return 200, self._page(variables)
+        if op in ("SetProductBasicInformation", "RemoveProductBasicInformationOverrides"):
+            pid = _entity((variables.get("input") or {}).get("productId"))
+            data = (variables.get("input") or {}).get("data") or {}
+            field = ("setProductBasicInformation" if op.startswith("Set")
+                     else "removeProductBasicInformationOverrides")
+            product = {"id": f"bc/store/product/{pid}",
+                       "overridesForLocale": {"basicInformation": data}}
+            return 200, {"data": {"product": {field: {"product": product}}}}
+        return 200, {"data": {}}
+
+    def _node(self, pid: int) -> Dict[str, Any]:
+        p = self.product(pid)
+        return {"id": f"bc/store/product/{pid}",
+                "basicInformation": {"name": p["name"], "description": p["description"]}}
+
+    def _override(self, pid: int, locale: str) -> Dict[str, Any]:
+        return {"basicInformation": {"name": f"[{locale}] Product {pid}",
+                                     "description": f"<p>[{locale}] Product {pid}</p>"}}
+
+    def _page(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        first = int(variables.get("first") or 10)
+        if variables.get("ids"):
+            ids = [_entity(i) for i in variables["ids"]]
+            offset, has_next = 0, False
+        else:
+            offset = int(variables.get("after") or 0)
+            ids = list(range(offset + 1, min(offset + first, self.products) + 1))
+            has_next = offset + first < self.products
+        locales = [v for k, v in sorted(variables.items()) if re.fullmatch(r"l\d+", k)]
+        edges = []
+        for pid in ids:
+            node = self._node(pid)
+            for i, loc in enumerate(locales):
+                node[f"l{i}"] = self._override(pid, loc)
+            edges.append({"node": node})
+        page_info = {"hasNextPage": has_next, "endCursor": str(offset + len(ids))}
+        return {"data": {"store": {"products": {"pageInfo": page_info, "edges": edges}}}}
+
+    # Gemini generateContent
+    def _vertex(self, payload: Dict[str, Any]) -> Tuple[int, Any]:
+        prompt = payload["contents"][0]["parts"][0]["text"]
+        match = re.search(r"(?:Languages:|into:)\s*([^\n.]+)", prompt)
+        langs = [l.strip() for l in match.group(1).split(",")] if match else ["en"]
+        segments = re.findall(r"<<(\d+)>> (.*)", prompt)
+        if segments:
+            text = "".join(
+                f"=== [{lang}]\n" + "".join(f"<<{n}>> [{lang}] {seg}\n" for n, seg in segments)
+                for lang in langs
+            )
+        else:
+            text = "".join(f"=== {lang}\n<h3>[{lang}] Product</h3><p>[{lang}] copy.</p>\n"
+                           for lang in langs)
+        usage = {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": len(text) // 4}
+        return 200, {"candidates": [{"content": {"parts": [{"text": text}]}}], "usageMetadata": usage}
+
+
+def _entity(gql_id: Any) -> int:
+    return int(str(gql_id).rsplit("/", 1)[-1])
+
+
+def install(upstreams: Upstreams) -> None:
+    """Routes every `requests` call in this process to `upstreams`."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    def send(self, request, **kwargs):
+        status, body = upstreams.handle(request.method, request.url, request.body)
+        resp = requests.Response()
+        resp.status_code = status
+        resp._content = json.dumps(body).encode("utf-8")
+        resp.headers["Content-Type"] = "application/json"
+        resp.url = request.url
+        resp.request = request
+        resp.encoding = "utf-8"
+        return resp
+
+    HTTPAdapter.send = send
+
+
+# ─────────────────────────── In-process ASGI driver ───────────────
+async def asgi_request(app, method: str, target: str, body: Optional[Dict[str, Any]] = None) -> Tuple[int, bytes]:
+    """One request through `app`; returns (status, response bytes)."""
+    path, _, query = target.partition("?")
+    raw = json.dumps(body).encode("utf-8") if body is not None else b""
+    headers = [(b"host", b"loadtest")]
+    if body is not None:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(raw)).encode())]
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "root_path": "", "headers": headers,
+        "client": ("127.0.0.1", 50000), "server": ("loadtest", 80),
+    }
+    done = asyncio.Event()
+    sent_body = False
+    status = 0
+    chunks: List[bytes] = []
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {"type": "http.request", "body": raw, "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                done.set()
+
+    await app(scope, receive, send)
+    done.set()
+    return status, b"".join(chunks)
+
+
+class _Lifespan:
+    """Runs the app's startup/shutdown hooks around the test."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+        self._inbox: asyncio.Queue = asyncio.Queue()
+        self._outbox: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(
+            self.app({"type": "lifespan", "asgi": {"version": "3.0"}}, self._inbox.get, self._outbox.put))
+        await self._inbox.put({"type": "lifespan.startup"})
+        await self._outbox.get()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._inbox.put({"type": "lifespan.shutdown"})
+        await self._outbox.get()
+        await self._task
+
+
+# ─────────────────────────── Scenarios ────────────────────────────
+class Scenario(NamedTuple):
+    name: str
+    method: str
+    target: Callable[[random.Random, int], str]
+    body: Optional[Callable[[random.Random, int], Dict[str, Any]]] = None
+    # Counts failures a 200 response can still carry (e.g. per-product outcomes).
+    failures: Optional[Callable[[bytes], int]] = None
+
+
+def generation_failures(payload: bytes) -> int:
+    """Products of a /api/generate-overrides response that came back as errors."""
+    try:
+        results = json.loads(payload).get("results") or {}
+    except (ValueError, AttributeError):
+        return 1
+    return sum(
+        1 for result in results.values()
+        if not isinstance(result, dict) or "vertex_error" in result or result.get("status") == "error"
+    )
+
+
+def scenarios(products: int) -> List[Scenario]:
+    def pid(rng: random.Random) -> int:
+        return rng.randint(1, products)
+
+    return [
+        Scenario("locales", "GET", lambda rng, i: "/api/locales"),
+        Scenario("products", "GET", lambda rng, i: f"/api/products?limit=10&page={rng.randint(1, max(1, products // 10))}"),
+        Scenario("overrides", "GET",
+                 lambda rng, i: "/api/overrides?ids=" + ",".join(str(pid(rng)) for _ in range(10))),
+        Scenario("products-with-overrides", "GET",
+                 lambda rng, i: f"/api/products-with-overrides?limit=10&page={rng.randint(1, 5)}"),
+        Scenario("update-basic-info", "POST", lambda rng, i: "/api/update-basic-info",
+                 lambda rng, i: {"product_id": pid(rng),
+                                 "locales": {"es": {"name": f"Producto {i}", "description": "<p>…</p>"}}}),
+        Scenario("generate-overrides", "POST", lambda rng, i: "/api/generate-overrides",
+                 lambda rng, i: {"ids": [pid(rng)], "target_locales": ["es", "fr"]},
+                 generation_failures),
+    ]
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+async def _loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """Worst event-loop oversleep while `stop` is unset, in seconds."""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def run_scenario(app, scenario: Scenario, *, requests: int, concurrency: int,
+                       seed: int = 0) -> Dict[str, Any]:
+    rng = random.Random(f"{seed}:{scenario.name}")
+    plan = [(scenario.target(rng, i), scenario.body(rng, i) if scenario.body else None)
+            for i in range(requests)]
+    latencies: List[float] = []
+    errors = 0
+    cursor = iter(plan)
+
+    async def worker():
+        nonlocal errors
+        for target, body in cursor:
+            start = time.perf_counter()
+            try:
+                status, payload = await asgi_request(app, scenario.method, target, body)
+            except Exception as exc:
+                _LOG.error("%s %s raised → %s", scenario.method, target, exc)
+                status, payload = 599, b""
+            latencies.append(time.perf_counter() - start)
+            if status < 400 and scenario.failures and scenario.failures(payload):
+                _LOG.error("%s %s → failed outcomes in %s", scenario.method, target, payload[:200])
+                status = 599
+            errors += status >= 400
+
+    stop = asyncio.Event()
+    lag = asyncio.create_task(_loop_lag(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    wall = time.perf_counter() - started
+    stop.set()
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        "loop_lag_ms": round(await lag * 1000, 2),
+    }
+
+
+# ─────────────────────────── Baseline gate ────────────────────────
+# Absolute slack so sub-millisecond baselines don't fail on scheduler noise.
+_FLOOR_MS = {"p95_ms": 5.0, "p99_ms": 5.0, "loop_lag_ms": 20.0}
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            tolerance: float) -> List[str]:
+    """Human-readable regressions of `results` against `baseline`; empty when within tolerance."""
+    failures = []
+    for name, cur in results.items():
+        if cur["errors"]:
+            failures.append(f"{name}: {cur['errors']} failed requests")
+        ref = baseline.get(name)
+        if not ref:
+            continue
+        if cur["rps"] < ref["rps"] * (1 - tolerance):
+            failures.append(f"{name}: throughput {cur['rps']} rps < baseline {ref['rps']}")
+        for metric, floor in _FLOOR_MS.items():
+            limit = max(ref.get(metric, 0.0) * (1 + tolerance), ref.get(metric, 0.0) + floor)
+            if cur[metric] > limit:
+                failures.append(f"{name}: {metric} {cur[metric]} > {limit:.2f} (baseline {ref.get(metric)})")
+    return failures
+
+
+# ─────────────────────────── CLI ──────────────────────────────────
+def _load_app(args) -> Tuple[Any, Upstreams]:
+    if "src.config" in sys.modules:
+        raise RuntimeError("src.config was imported before the load-test environment was set")
+    # Process env beats .env in pydantic-settings, so a local .env cannot
+    # point the run at a real outbox or change the cache/log settings.
+    os.environ.update(_STANDIN_ENV)
+    if args.cache_ttl is not None:
+        os.environ["CACHE_TTL_SECONDS"] = str(args.cache_ttl)
+    upstreams = Upstreams(products=args.products, bc_latency=args.bc_latency,
+                          vertex_latency=args.vertex_latency)
+    install(upstreams)
+    # First import of src.config: settings are built from the environment above.
+    from src.utils.logger import setup_logging
+    from main import app
+
+    setup_logging(__name__)
+
+    return app, upstreams
+
+
+async def _run_all(app, selected: List[Scenario], args) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    async with _Lifespan(app):
+        for scenario in selected:
+            results[scenario.name] = await run_scenario(
+                app, scenario, requests=args.requests, concurrency=args.concurrency, seed=args.seed)
+            _LOG.info("%s → %s", scenario.name, results[scenario.name])
+    return results
+
+
+def cmd_run(args) -> int:
+    app, upstreams = _load_app(args)
+    selected = [s for s in scenarios(args.products) if not args.scenarios or s.name in args.scenarios]
+    results = asyncio.run(_run_all(app, selected, args))
+    report = {"concurrency": args.concurrency, "requests": args.requests,
+              "upstream_calls": dict(upstreams.calls), "scenarios": results}
+    out = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(out, encoding="utf-8")
+    print(out)
+
+    if args.update_baseline:
+        path = Path(args.update_baseline)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(results, indent=2, sort_keys=True), encoding="utf-8")
+        _LOG.info("Baseline written to %s", path)
+        return 0
+    if not args.baseline:
+        return 0
+    if not Path(args.baseline).exists():
+        _LOG.error("Baseline %s not found → record one with --update-baseline", args.baseline)
+        return 2
+    failures = compare(results, json.loads(Path(args.baseline).read_text(encoding="utf-8")), args.tolerance)
+    for failure in failures:
+        _LOG.error("Regression: %s", failure)
+    return 1 if failures else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="load_test", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("run", help="run the scenarios and optionally gate against a baseline")
+    p.add_argument("--scenarios", nargs="*", help="subset of scenario names (default: all)")
+    p.add_argument("--concurrency", type=int, default=16)
+    p.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    p.add_argument("--products", type=int, default=500, help="stand-in catalog size")
+    p.add_argument("--bc-latency", type=float, default=0.02, help="seconds per BigCommerce call")
+    p.add_argument("--vertex-latency", type=float, default=0.2, help="seconds per Vertex call")
+    p.add_argument("--cache-ttl", type=float, help="override CACHE_TTL_SECONDS (0 = always cold)")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--output", help="write the JSON report here as well")
+    p.add_argument("--baseline", help="baseline JSON to gate against")
+    p.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    p.add_argument("--update-baseline", metavar="PATH", help="store these results as the new baseline")
+    p.set_defaults(func=cmd_run)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Bulk export / import of the localization matrix.
+
+    python -m src.jobs.matrix_transfer export --format csv   --out matrix.csv
+    python -m src.jobs.matrix_transfer export --format xliff --source en --target de --out de.xlf
+    python -m src.jobs.matrix_transfer import matrix.csv [--dry-run]
+    python -m src.jobs.matrix_transfer import de.xlf
+"""
+import argparse
+import json
+from typing import List, Optional
+
+from src.api.locales import active_locales
+from src.client.bc_client import BigCommerceClient
+from src.config import settings
+from src.services import matrix_io
+from src.services.override_outbox import OutboxFlusher, default_outbox
+from src.services.product_multilang_service import ProductLocalizationService
+from src.utils.priority_lanes import BULK
+
+
+def _service() -> ProductLocalizationService:
+    # No response cache: a full export must not fill it with every page.
+    return ProductLocalizationService(
+        BigCommerceClient(environment=settings.BC_ENV, debug=settings.DEBUG_MODE, lane=BULK)
+    )
+
+
+def cmd_export(args) -> None:
+    channel_id = args.channel_id or settings.BC_CHANNEL_ID
+    srv = _service()
+    if args.format == "xliff":
+        if not args.target:
+            raise SystemExit("--target is required for XLIFF export")
+        rows = matrix_io.iter_matrix(srv, channel_id, [args.source, args.target],
+                                     page_size=args.page_size)
+        chunks = matrix_io.iter_xliff(rows, args.source, args.target)
+    else:
+        locales = args.locales or active_locales(channel_id)
+        chunks = matrix_io.iter_csv(
+            matrix_io.iter_matrix(srv, channel_id, locales, page_size=args.page_size)
+        )
+    with open(args.out, "w", encoding="utf-8", newline="") as fh:
+        written = matrix_io.write_chunks(chunks, fh)
+    print(json.dumps({"out": args.out, "chars": written}))
+
+
+def cmd_import(args) -> None:
+    channel_id = args.channel_id or settings.BC_CHANNEL_ID
+    srv = _service()
+    outbox = None if args.direct else default_outbox()
+    if args.path.endswith((".xlf", ".xliff")):
+        with open(args.path, "rb") as fh:
+            stats = matrix_io.import_rows(srv, matrix_io.read_xliff(fh), channel_id,
+                                          batch_size=args.batch_size, outbox=outbox,
+                                          dry_run=args.dry_run)
+    else:
+        with open(args.path, encoding="utf-8", newline="") as fh:
+            stats = matrix_io.import_rows(srv, matrix_io.read_csv(fh), channel_id,
+                                          batch_size=args.batch_size, outbox=outbox,
+                                          dry_run=args.dry_run)
+    if outbox is not None and not args.dry_run:
+        # Nothing else drains the outbox in this process: flush before exiting
+        # so `changed` rows have actually reached BigCommerce.
+        flusher = OutboxFlusher(outbox, srv, batch_size=settings.OUTBOX_BATCH_SIZE,
+                                interval=settings.OUTBOX_FLUSH_INTERVAL)
+        stats["outbox"] = flusher.drain(timeout=args.drain_timeout)
+    print(json.dumps(stats))
+    if stats.get("outbox", {}).get("pending"):
+        raise SystemExit(f"{stats['outbox']['pending']} outbox rows still pending after {args.drain_timeout}s")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="matrix_transfer", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--channel-id", type=int)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("export")
+    p.add_argument("--format", choices=("csv", "xliff"), default="csv")
+    p.add_argument("--out", required=True)
+    p.add_argument("--locales", nargs="*", help="CSV locales (default: active)")
+    p.add_argument("--source", default="en", help="XLIFF source locale")
+    p.add_argument("--target", help="XLIFF target locale")
+    p.add_argument("--page-size", type=int, default=50)
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("import")
+    p.add_argument("path", help=".csv or .xlf/.xliff file")
+    p.add_argument("--batch-size", type=int, default=50)
+    p.add_argument("--dry-run", action="store_true", help="only report what would change")
+    p.add_argument("--direct", action="store_true", help="bypass the outbox even if configured")
+    p.add_argument("--drain-timeout", type=float, default=600.0,
+                   help="seconds to keep flushing the outbox before giving up")
+    p.set_defaults(func=cmd_import)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
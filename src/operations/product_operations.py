@@ -2,6 +2,8 @@ import os
 from requests import HTTPError
 from src.utils.logger import setup_logging
 from src.client.bc_client import BigCommerceClient
+from src.services.cache import LISTING_TAG
+from src.services.product_catalog import CompactCatalog, LISTING_FIELDS
 
 try:
     from src.config import BC_CHANNEL_ID, settings
@@ -13,33 +15,86 @@ except ImportError:
 _LOG = setup_logging(__name__)
 
 class ProductOperations:
-    def __init__(self, client: BigCommerceClient):
+    def __init__(self, client: BigCommerceClient, cache=None):
         self.client = client
+        self.cache = cache
 
-    def get_bigcommerce_products(self, channel_id=BC_CHANNEL_ID):
-        """Fetches all products for a given channel"""
-        products = []
+    def iter_bigcommerce_products(self, channel_id=BC_CHANNEL_ID, *, include="variants",
+                                  include_fields=None, limit=250):
+        """Yields products page by page for a given channel.
+
+        `include_fields` is forwarded to BigCommerce so only the projected
+        columns come back; pass `include=None` to skip sub-resources.
+        """
         page = 1
         while True:
-            params = {
-                "channel_id": channel_id,
-                "limit": 250,
-                "page": page,
-                "include": "variants"
-            }
+            params = {"channel_id": channel_id, "limit": limit, "page": page}
+            if include:
+                params["include"] = include
+            if include_fields:
+                params["include_fields"] = ",".join(include_fields)
             try:
-                data =  self.client.rest(method="GET",endpoint= "/catalog/products", params=params)
-                items = data.get("data", [])
+                data = self.client.rest(method="GET", endpoint="/catalog/products", params=params)
+                items = (data or {}).get("data", [])
                 if not items:
                     break
-                products.extend(items)
+                yield from items
+                if len(items) < limit:
+                    break
                 page += 1
             except HTTPError as e:
                 _LOG.error(f"Failed to fetch page {page} of products for channel {channel_id}: {e}")
                 break
+
+    def get_bigcommerce_products(self, channel_id=BC_CHANNEL_ID, *, include="variants", include_fields=None):
+        """Fetches all products for a given channel"""
+        products = list(self.iter_bigcommerce_products(
+            channel_id, include=include, include_fields=include_fields))
         _LOG.info(f"Retrieved {len(products)} products from BigCommerce channel={channel_id}")
         return products
 
+    def get_compact_catalog(self, channel_id=BC_CHANNEL_ID):
+        """Fetches the listing projection of a channel into a CompactCatalog."""
+        if self.cache is not None:
+            return self.cache.get_or_set(
+                ("catalog", channel_id),
+                lambda: self._load_compact_catalog(channel_id),
+                tags=(LISTING_TAG,),
+            )
+        return self._load_compact_catalog(channel_id)
+
+    def refresh_cached_catalogs(self, product_ids) -> bool:
+        """
+        Re-reads `product_ids` and patches them into every cached compact
+        catalog. False when a product joined or left a channel (the caller
+        then drops the catalogs); nothing is fetched if none is cached.
+        """
+        product_ids = sorted(set(product_ids))
+        catalogs = self.cache.tagged(LISTING_TAG) if self.cache is not None else {}
+        for key, catalog in catalogs.items():
+            if not (isinstance(key, tuple) and key[0] == "catalog"):
+                continue
+            seen = set()
+            for i in range(0, len(product_ids), 250):
+                chunk = product_ids[i:i + 250]
+                data = self.client.rest(method="GET", endpoint="/catalog/products", params={
+                    "channel_id": key[1], "id:in": ",".join(map(str, chunk)), "limit": len(chunk),
+                    "include_fields": ",".join(LISTING_FIELDS),
+                })
+                for product in (data or {}).get("data", []):
+                    if not catalog.replace(product):
+                        return False
+                    seen.add(int(product["id"]))
+            if any(pid in catalog and pid not in seen for pid in product_ids):
+                return False
+        return True
+
+    def _load_compact_catalog(self, channel_id):
+        catalog = CompactCatalog.from_products(self.iter_bigcommerce_products(
+            channel_id, include=None, include_fields=LISTING_FIELDS))
+        _LOG.info(f"Retrieved {len(catalog)} compact products from BigCommerce channel={channel_id}")
+        return catalog
+
     def create_bigcommerce_product(self, payload):
         """Creates a single product in BigCommerce."""
         try:
@@ -1,7 +1,8 @@
 from typing import Tuple, Dict, Any
 
-def get_locales(channel_id: int) -> Tuple[str, Dict[str, Any]]:
-    query = """
+from src.queries.registry import GqlDocument, register
+
+_LOCALES_QUERY = register("GetLocales", """
     query GetLocales($channelId: ID!) {
       store {
         locales(input: { channelId: $channelId }) {
@@ -15,8 +16,11 @@ def get_locales(channel_id: int) -> Tuple[str, Dict[str, Any]]:
         }
       }
     }
-    """
+    """)
+
+
+def get_locales(channel_id: int) -> Tuple[GqlDocument, Dict[str, Any]]:
     variables: Dict[str, Any] = {
         "channelId": f"bc/store/channel/{channel_id}"
     }
-    return query, variables
\ No newline at end of file
+    return _LOCALES_QUERY, variables
\ No newline at end of file
@@ -1,47 +1,41 @@
-def get_product_query() -> str:
-    return """
-    query($productId: ID!, $channelId: ID!, $locale: String!) {
-      store {
-        products(filters: { ids: [$productId] }) {
-          edges {
-            node {
-              id
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.queries.registry import GqlDocument, register
+
+_UPDATE_MUTATION = register("SetProductBasicInformation", """
+    mutation SetProductBasicInformation(
+      $input: SetProductBasicInformationInput!,
+      $channelId: ID!,
+      $locale: String!
+    ) {
+      product {
+        setProductBasicInformation(input: $input) {
+          product {
+            id
+            overridesForLocale(localeContext: {
+              channelId: $channelId,
+              locale: $locale
+            }) {
               basicInformation {
                 name
                 description
               }
-              overridesForLocale(localeContext: { channelId: $channelId, locale: $locale }) {
-                basicInformation {
-                  name
-                  description
-                }
-              }
-            }
-          }
-        }
-        product(id: $productId) {
-          images {
-            edges {
-              node {
-                urlStandard
-              }
             }
           }
         }
       }
     }
-    """
-
+    """)
 
-def get_update_mutation() -> str:
-    return """
-    mutation SetProductBasicInformation(
-      $input: SetProductBasicInformationInput!,
+_DELETE_OVERRIDE_MUTATION = register("RemoveProductBasicInformationOverrides", """
+    mutation RemoveProductBasicInformationOverrides(
+      $input: RemoveProductBasicInformationOverridesInput!,
       $channelId: ID!,
       $locale: String!
     ) {
       product {
-        setProductBasicInformation(input: $input) {
+        removeProductBasicInformationOverrides(input: $input) {
           product {
             id
             overridesForLocale(localeContext: {
@@ -57,36 +51,133 @@ def get_update_mutation() -> str:
         }
       }
     }
+    """)
+
+
+PRODUCT_FIELDS = ("name", "description", "images")
+LIST_FIELDS = ("name", "description")
+
+
+def normalize_fields(fields: Optional[Iterable[str]], default: Tuple[str, ...] = PRODUCT_FIELDS) -> Tuple[str, ...]:
+    """
+    Canonical, hashable field selection; `name` is always kept as the row
+    label. Only fields in `default` are accepted, so list queries
+    (LIST_FIELDS) reject `images` instead of silently dropping it.
     """
+    if fields is None:
+        return default
+    wanted = set(fields) | {"name"}
+    unknown = wanted - set(PRODUCT_FIELDS)
+    if unknown:
+        raise ValueError(f"unknown product fields: {sorted(unknown)}")
+    unsupported = wanted - set(default)
+    if unsupported:
+        raise ValueError(f"fields not available here: {sorted(unsupported)}; use one of {list(default)}")
+    return tuple(f for f in PRODUCT_FIELDS if f in wanted)
 
 
-def get_delete_override_mutation(product_id: int, locale: str, field: str, channel_id: int) -> str:
-    return f"""
-    mutation {{
-      product {{
-        removeProductBasicInformationOverrides(
-          input: {{
-            productId: "bc/store/product/{product_id}",
-            localeContext: {{
-              channelId: "bc/store/channel/{channel_id}",
-              locale: "{locale}"
-            }},
-            overridesToRemove: [{field}]
-          }}
-        ) {{
-          product {{
-            id
-            overridesForLocale(localeContext: {{
-              channelId: "bc/store/channel/{channel_id}",
-              locale: "{locale}"
-            }}) {{
-              basicInformation {{
-                name
-                description
+def _basic_information(fields: Tuple[str, ...], indent: str) -> str:
+    inner = "".join(f"\n{indent}  {f}" for f in fields if f in LIST_FIELDS)
+    return f"basicInformation {{{inner}\n{indent}}}"
+
+
+def _doc_suffix(fields: Tuple[str, ...]) -> str:
+    return "".join(f.capitalize() for f in fields)
+
+
+@lru_cache(maxsize=16)
+def get_product_query(fields: Tuple[str, ...] = PRODUCT_FIELDS) -> GqlDocument:
+    """Single product + one locale override, limited to `fields` (see normalize_fields)."""
+    info = _basic_information(fields, "              ")
+    override_info = _basic_information(fields, "                ")
+    images = """
+        product(id: $productId) {
+          images {
+            edges {
+              node {
+                urlStandard
+              }
+            }
+          }
+        }""" if "images" in fields else ""
+    name = f"GetLocalizedProduct{_doc_suffix(fields)}"
+    return register(name, f"""
+    query {name}($productId: ID!, $channelId: ID!, $locale: String!) {{
+      store {{
+        products(filters: {{ ids: [$productId] }}) {{
+          edges {{
+            node {{
+              id
+              {info}
+              overridesForLocale(localeContext: {{ channelId: $channelId, locale: $locale }}) {{
+                {override_info}
               }}
             }}
           }}
+        }}{images}
+      }}
+    }}
+    """)
+
+
+def get_update_mutation() -> GqlDocument:
+    return _UPDATE_MUTATION
+
+
+def get_delete_override_mutation(
+    product_id: int, locale: str, fields: List[str], channel_id: int
+) -> Tuple[GqlDocument, Dict[str, Any]]:
+    variables: Dict[str, Any] = {
+        "input": {
+            "productId": f"bc/store/product/{product_id}",
+            "localeContext": {
+                "channelId": f"bc/store/channel/{channel_id}",
+                "locale": locale,
+            },
+            "overridesToRemove": list(fields),
+        },
+        "channelId": f"bc/store/channel/{channel_id}",
+        "locale": locale,
+    }
+    return _DELETE_OVERRIDE_MUTATION, variables
+
+
+@lru_cache(maxsize=64)
+def get_products_page_query(
+    locale_count: int, *, by_ids: bool = False, fields: Tuple[str, ...] = LIST_FIELDS
+) -> GqlDocument:
+    """
+    One page of `store.products` with base info and every requested locale
+    override aliased as `l0..lN` (bound to `$l0..$lN`), limited to `fields`.
+    """
+    locale_vars = "".join(f", $l{i}: String!" for i in range(locale_count))
+    filters = ", filters: { ids: $ids }" if by_ids else ""
+    ids_var = ", $ids: [ID!]!" if by_ids else ""
+    info = _basic_information(fields, "              ")
+    override_info = _basic_information(fields, "                ")
+    overrides = "".join(
+        f"""
+              l{i}: overridesForLocale(localeContext: {{ channelId: $channelId, locale: $l{i} }}) {{
+                {override_info}
+              }}"""
+        for i in range(locale_count)
+    )
+    name = f"ProductsPage{'ByIds' if by_ids else ''}L{locale_count}{_doc_suffix(fields)}"
+    return register(name, f"""
+    query {name}($channelId: ID!, $first: Int!, $after: String{ids_var}{locale_vars}) {{
+      store {{
+        products(first: $first, after: $after{filters}) {{
+          pageInfo {{
+            hasNextPage
+            endCursor
+          }}
+          edges {{
+            node {{
+              id
+              {info}{overrides}
+            }}
+          }}
         }}
       }}
     }}
-    """
\ No newline at end of file
+    """)
@@ -0,0 +1,44 @@
+import hashlib
+import re
+from typing import Dict, NamedTuple, Optional
+
+_WS = re.compile(r"\s+")
+_PUNCT_WS = re.compile(r"\s*([{}():,!\[\]=$])\s*")
+
+
+class GqlDocument(NamedTuple):
+    """A registered, minified GraphQL document with its persisted-query hash."""
+
+    name: str
+    query: str
+    sha256: str
+
+    def __str__(self) -> str:
+        return self.query
+
+
+_REGISTRY: Dict[str, GqlDocument] = {}
+
+
+def minify(query: str) -> str:
+    """Folds whitespace; documents must use variables, never string literals."""
+    return _PUNCT_WS.sub(r"\1", _WS.sub(" ", query)).strip()
+
+
+def register(name: str, query: str) -> GqlDocument:
+    """Defines a document once; re-registering the same name returns the original."""
+    existing = _REGISTRY.get(name)
+    if existing is not None:
+        return existing
+    text = minify(query)
+    doc = GqlDocument(name, text, hashlib.sha256(text.encode("utf-8")).hexdigest())
+    _REGISTRY[name] = doc
+    return doc
+
+
+def get(name: str) -> Optional[GqlDocument]:
+    return _REGISTRY.get(name)
+
+
+def documents() -> Dict[str, GqlDocument]:
+    return dict(_REGISTRY)
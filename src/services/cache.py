@@ -0,0 +1,144 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from src.config import settings
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe TTL cache whose entries carry tags (e.g. `product:42`,
+    `catalog`, `listing`, `locales`) so webhooks can drop exactly what changed.
+    `get_or_set` is single-flight: concurrent misses on one key share one
+    factory call. Entries are per process; other instances only see an
+    invalidation when their own copy expires.
+    """
+
+    def __init__(self, ttl: float = 300.0, maxsize: int = 10_000) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: Dict[Hashable, Tuple[float, Any, Tuple[str, ...]]] = {}
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self._inflight: Dict[Hashable, Tuple[Future, Tuple[str, ...]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            return self._get(key, default)
+
+    def set(self, key: Hashable, value: Any, *, tags: Iterable[str] = (), ttl: Optional[float] = None) -> Any:
+        tags = tuple(tags)
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            elif len(self._data) >= self.maxsize:
+                self._drop(next(iter(self._data)))
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+        return value
+
+    def get_or_set(self, key: Hashable, factory, *, tags: Iterable[str] = ()) -> Any:
+        """
+        Returns the cached value or runs `factory` once for all concurrent
+        callers of `key`; the others wait for its result (or its exception).
+        A value whose key was invalidated mid-flight is returned, not cached.
+        """
+        tags = tuple(tags)
+        with self._lock:
+            value = self._get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            flight = self._inflight.get(key)
+            if flight is None:
+                flight = self._inflight[key] = (Future(), tags)
+                leader = True
+            else:
+                leader = False
+        future = flight[0]
+        if not leader:
+            return future.result()
+
+        try:
+            value = factory()
+        except BaseException as exc:
+            with self._lock:
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+            future.set_exception(exc)
+            raise
+        with self._lock:
+            current = self._inflight.get(key) is flight
+            if current:
+                del self._inflight[key]
+        if current and value is not None:
+            self.set(key, value, tags=tags)
+        future.set_result(value)
+        return value
+
+    def tagged(self, tag: str) -> Dict[Hashable, Any]:
+        """Live entries carrying `tag`, keyed by cache key."""
+        with self._lock:
+            values = {key: self._get(key, _MISSING) for key in list(self._tags.get(tag, ()))}
+        return {key: value for key, value in values.items() if value is not _MISSING}
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._drop(key)
+            self._inflight.pop(key, None)
+
+    def invalidate_tag(self, tag: str) -> int:
+        with self._lock:
+            keys = self._tags.pop(tag, set())
+            for key in keys:
+                self._drop(key)
+            # Loads started before the invalidation must not repopulate it.
+            for key in [k for k, (_, t) in self._inflight.items() if tag in t]:
+                del self._inflight[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._tags.clear()
+            self._inflight.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _get(self, key: Hashable, default: Any) -> Any:
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            return default
+        expires, value, _ = entry
+        if expires < time.monotonic():
+            self._drop(key)
+            return default
+        return value
+
+    def _drop(self, key: Hashable) -> None:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+def product_tag(product_id: int) -> str:
+    return f"product:{product_id}"
+
+
+CATALOG_TAG = "catalog"
+LISTING_TAG = "listing"
+# Rendered /api/products pages only; they are re-cut from the cached catalog.
+LISTING_PAGES_TAG = "listing_pages"
+LOCALES_TAG = "locales"
+
+shared_cache = TTLCache(ttl=settings.CACHE_TTL_SECONDS)
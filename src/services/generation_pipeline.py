@@ -0,0 +1,91 @@
+"""
+Streaming generate-overrides: IDs are pulled lazily from any iterator,
+at most `max_in_flight` batches are being generated/written at a time,
+and each batch is reduced to compact outcomes before the next one is
+pulled, so memory does not grow with the number of IDs.
+"""
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from src.services.generation_service import (GENERATE, compact_multichannel_outcome, compact_outcome,
+                                             localize_products, localize_products_multichannel)
+from src.services.override_outbox import OverrideOutbox
+from src.services.product_multilang_service import ProductLocalizationService
+from src.utils.logger import setup_logging
+
+_LOG = setup_logging(__name__)
+
+
+def iter_ids_file(lines: Iterable[str]) -> Iterator[int]:
+    """
+    One product ID per line (commas also accepted); blanks and `#` comments
+    skipped. `lines` is any line iterator: an open file, a request body.
+    """
+    for line in lines:
+        line = line.split("#", 1)[0]
+        for token in line.replace(",", " ").split():
+            yield int(token)
+
+
+def _batches(ids: Iterable[int], size: int) -> Iterator[List[int]]:
+    it = iter(ids)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+def stream_outcomes(
+    srv: ProductLocalizationService,
+    product_ids: Iterable[int],
+    channel_id: int,
+    base_language: str,
+    target_locales: List[str],
+    *,
+    batch_size: int = 25,
+    max_in_flight: int = 2,
+    outbox: Optional[OverrideOutbox] = None,
+    mode: str = GENERATE,
+    channel_locales: Optional[Dict[int, List[str]]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yields one compact outcome per product, batch by batch in input order.
+    A new batch is only pulled from `product_ids` when the consumer has
+    taken the outcomes of an earlier one, so a slow consumer holds the
+    producer back. Raw mutation responses never leave the worker.
+    """
+
+    def run(batch: List[int]) -> List[Dict[str, Any]]:
+        if channel_locales:
+            results = localize_products_multichannel(srv, batch, channel_id, channel_locales,
+                                                     base_language, target_locales or None,
+                                                     outbox=outbox, mode=mode)
+            return [compact_multichannel_outcome(pid, res) for pid, res in results.items()]
+        results = localize_products(srv, batch, channel_id, base_language, target_locales,
+                                    outbox=outbox, mode=mode)
+        return [compact_outcome(pid, res) for pid, res in results.items()]
+
+    batches = _batches(product_ids, batch_size)
+    pending: deque = deque()
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, max_in_flight)) as pool:
+
+        def submit(batch: List[int]) -> None:
+            pending.append((batch, pool.submit(contextvars.copy_context().run, run, batch)))
+
+        for batch in islice(batches, max_in_flight):
+            submit(batch)
+        while pending:
+            batch, future = pending.popleft()
+            try:
+                outcomes = future.result()
+            except Exception as exc:
+                _LOG.error("Batch of %s products failed → %s", len(batch), exc)
+                outcomes = [{"id": pid, "status": "error", "error": str(exc)} for pid in batch]
+            nxt = next(batches, None)
+            if nxt is not None:
+                submit(nxt)
+            done += len(outcomes)
+            yield from outcomes
+    _LOG.info("Streamed %s product outcomes", done)
@@ -0,0 +1,211 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from src.client.vertex_client import generate_multilingual_descriptions_bulk
+from src.services.override_outbox import OverrideOutbox
+from src.services.product_multilang_service import ProductLocalizationService
+from src.services.translation_memory import translate_products
+
+GENERATE = "generate"
+TRANSLATE = "translate"
+
+
+def generate_payloads(
+    srv: ProductLocalizationService,
+    product_ids: List[int],
+    channel_id: int,
+    base_language: str,
+    target_locales: List[str],
+    mode: str = GENERATE,
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Base info → Vertex (bulk) for one batch, no writes.
+    Returns {pid: {locale: {name, description}}} or {pid: {"vertex_error": ...}};
+    the base language is always part of a successful payload.
+    """
+    bases = {}
+    for pid in product_ids:
+        base = srv.get_localized_data(pid, channel_id, [base_language],
+                                      fields=("name", "description"))
+        bases[pid] = base[base_language]
+
+    if mode == TRANSLATE:
+        generated = translate_products(
+            [{"product_id": pid, "name": base["name"], "description_html": base["description"]}
+             for pid, base in bases.items()],
+            base_language, target_locales,
+        )
+    else:
+        generated = generate_multilingual_descriptions_bulk([
+            {
+                "product_id":       pid,
+                "name":             base["name"],
+                "features":         base["description"],
+                "input_language":   base_language,
+                "target_languages": target_locales,
+            }
+            for pid, base in bases.items()
+        ])
+
+    payloads: Dict[int, Dict[str, Any]] = {}
+    for pid, base in bases.items():
+        translations, err = generated[str(pid)]
+
+        if err or not translations:
+            payloads[pid] = {"vertex_error": err or "empty_response"}
+            continue
+
+        payload = {
+            base_language: {"name": base["name"], "description": base["description"]}
+        }
+        for full_code, t in translations.items():
+            payload[full_code] = {
+                "name":        t["product_name"],
+                "description": t["description"],
+            }
+        payloads[pid] = payload
+    return payloads
+
+
+def write_payload(
+    srv: ProductLocalizationService,
+    product_id: int,
+    payload: Dict[str, Dict[str, str]],
+    channel_id: int,
+    outbox: Optional[OverrideOutbox] = None,
+) -> Dict[str, Any]:
+    if outbox is not None:
+        outbox.append(product_id, channel_id, payload)
+        return {loc: {"status": "queued", **data} for loc, data in payload.items()}
+    return srv.update_all_locales(product_id, payload, channel_id)
+
+
+def localize_products(
+    srv: ProductLocalizationService,
+    product_ids: List[int],
+    channel_id: int,
+    base_language: str,
+    target_locales: List[str],
+    outbox: Optional[OverrideOutbox] = None,
+    mode: str = GENERATE,
+) -> Dict[int, Any]:
+    """
+    Base info → Vertex (bulk) → overrides for one batch of products.
+    `mode="translate"` translates the base copy through the translation
+    memory instead of writing new copy from it.
+    Returns {pid: {locale: mutation response}} or {pid: {"vertex_error": ...}}.
+    With an `outbox`, overrides are committed there and flushed in the
+    background; the per-locale entry is then {"status": "queued", name, description}.
+    """
+    results: Dict[int, Any] = {}
+    for pid, payload in generate_payloads(srv, product_ids, channel_id, base_language,
+                                          target_locales, mode).items():
+        if "vertex_error" in payload:
+            results[pid] = payload
+        else:
+            results[pid] = write_payload(srv, pid, payload, channel_id, outbox)
+    return results
+
+
+def resolve_channel_locales(payload: Dict[str, Any], channel_locales: List[str]) -> Dict[str, Any]:
+    """
+    Maps generated locale codes onto one channel's active locales: exact
+    code first, then by language (`es` → `es-MX`). Unmatched codes are dropped.
+    """
+    out: Dict[str, Any] = {}
+    for code in channel_locales:
+        if code in payload:
+            out[code] = payload[code]
+            continue
+        lang = code.split("-")[0].split("_")[0].lower()
+        match = next((data for loc, data in payload.items() if loc.lower() == lang), None)
+        if match is not None:
+            out[code] = match
+    return out
+
+
+def localize_products_multichannel(
+    srv: ProductLocalizationService,
+    product_ids: List[int],
+    source_channel_id: int,
+    channel_locales: Dict[int, List[str]],
+    base_language: str,
+    target_locales: Optional[List[str]] = None,
+    outbox: Optional[OverrideOutbox] = None,
+    mode: str = GENERATE,
+    max_workers: int = 4,
+) -> Dict[int, Any]:
+    """
+    Generates once from `source_channel_id` for the union of every
+    channel's locales, then writes each channel's share concurrently.
+    `channel_locales` is {channel_id: active locales}.
+    Returns {pid: {channel_id: {locale: mutation response}}} or {pid: {"vertex_error": ...}}.
+    """
+    union = sorted({loc for locs in channel_locales.values() for loc in locs})
+    targets = vertex_targets(base_language, target_locales, union)
+    payloads = generate_payloads(srv, product_ids, source_channel_id, base_language, targets, mode)
+
+    writes = [
+        (pid, channel_id, resolve_channel_locales(payload, locales))
+        for pid, payload in payloads.items() if "vertex_error" not in payload
+        for channel_id, locales in channel_locales.items()
+    ]
+    results: Dict[int, Any] = {pid: p for pid, p in payloads.items() if "vertex_error" in p}
+    for (pid, channel_id, _), resp in zip(writes, _fan_out(srv, writes, outbox, max_workers)):
+        results.setdefault(pid, {})[channel_id] = resp
+    return results
+
+
+def write_to_channels(
+    srv: ProductLocalizationService,
+    product_id: int,
+    payload: Dict[str, Dict[str, str]],
+    channel_locales: Dict[int, List[str]],
+    outbox: Optional[OverrideOutbox] = None,
+    max_workers: int = 4,
+) -> Dict[int, Any]:
+    """One product's payload to many channels at once → {channel_id: {locale: response}}."""
+    writes = [(product_id, channel_id, resolve_channel_locales(payload, locales))
+              for channel_id, locales in channel_locales.items()]
+    return {w[1]: resp for w, resp in zip(writes, _fan_out(srv, writes, outbox, max_workers))}
+
+
+def _fan_out(srv, writes, outbox, max_workers: int) -> List[Any]:
+    """Runs (pid, channel_id, payload) writes concurrently, in order."""
+    # Copies keep the caller's lane and request accounting on the worker threads.
+    contexts = [contextvars.copy_context() for _ in writes]
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        return list(pool.map(
+            lambda ctx, w: ctx.run(write_payload, srv, w[0], w[2], w[1], outbox) if w[2] else {},
+            contexts, writes,
+        ))
+
+
+def vertex_targets(base_language: str, requested: List[str] | None, active: List[str]) -> List[str]:
+    return [l for l in (requested or active) if l != base_language]
+
+
+def compact_outcome(product_id: int, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduces one `localize_products` entry to a small, JSON-friendly status."""
+    if "vertex_error" in result:
+        return {"id": product_id, "status": "error", "error": result["vertex_error"]}
+    written = sorted(loc for loc, resp in result.items() if resp)
+    failed = sorted(loc for loc, resp in result.items() if not resp)
+    return {
+        "id": product_id,
+        "status": "ok" if not failed else "partial",
+        "locales": written,
+        "failed_locales": failed,
+    }
+
+
+def compact_multichannel_outcome(product_id: int, result: Dict[Any, Any]) -> Dict[str, Any]:
+    """`compact_outcome` per channel for a `localize_products_multichannel` entry."""
+    if "vertex_error" in result:
+        return compact_outcome(product_id, result)
+    channels = {ch: compact_outcome(product_id, res) for ch, res in result.items()}
+    for outcome in channels.values():
+        del outcome["id"]
+    ok = all(o["status"] == "ok" for o in channels.values())
+    return {"id": product_id, "status": "ok" if ok else "partial", "channels": channels}
@@ -0,0 +1,192 @@
+"""
+Streaming CSV / XLIFF 1.2 export and import of the (product × locale) matrix.
+Exports pull pages from `iter_localized_products` and emit text chunks;
+imports parse incrementally and write only rows whose normalized value changed.
+"""
+import csv
+import io
+import xml.etree.ElementTree as ET
+from itertools import islice
+from typing import Dict, IO, Iterable, Iterator, List, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from src.services.product_multilang_service import ProductLocalizationService
+from src.utils.html_text import normalized_key
+from src.utils.logger import setup_logging
+
+_LOG = setup_logging(__name__)
+
+CSV_COLUMNS = ("product_id", "locale", "name", "description")
+_FIELDS = ("name", "description")
+_XLIFF_NS = "urn:oasis:names:tc:xliff:document:1.2"
+
+# A matrix row: (product_id, locale, name, description)
+Row = Tuple[int, str, str, str]
+
+
+def iter_matrix(
+    srv: ProductLocalizationService,
+    channel_id: int,
+    locales: List[str],
+    *,
+    page_size: int = 50,
+) -> Iterator[Row]:
+    for item in srv.iter_localized_products(channel_id, locales, page_size=page_size):
+        for o in item["overrides"]:
+            yield item["id"], o["locale"], o["name"] or "", o["description"] or ""
+
+
+# ─────────────────────────── Export ───────────────────────────────
+def iter_csv(rows: Iterable[Row], *, chunk_rows: int = 500) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(CSV_COLUMNS)
+    for n, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if n % chunk_rows == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def iter_xliff(
+    rows: Iterable[Row],
+    source_locale: str,
+    target_locale: str,
+    *,
+    chunk_rows: int = 200,
+) -> Iterator[str]:
+    """
+    One XLIFF <file> for a source→target pair. `rows` must carry both
+    locales per product, source first (as `iter_matrix` yields them).
+    """
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<xliff version="1.2" xmlns="{_XLIFF_NS}">\n'
+        f'<file original="products" datatype="html" source-language={quoteattr(source_locale)} '
+        f'target-language={quoteattr(target_locale)}>\n<body>\n'
+    )
+    parts: List[str] = []
+    source: Dict[int, Row] = {}
+    for row in rows:
+        pid, loc = row[0], row[1]
+        if loc == source_locale:
+            source[pid] = row
+            continue
+        if loc != target_locale:
+            continue
+        src = source.pop(pid, None) or row
+        for i, field in enumerate(_FIELDS, start=2):
+            parts.append(
+                f'<trans-unit id="{pid}/{field}">'
+                f"<source>{escape(src[i])}</source>"
+                f"<target>{escape(row[i])}</target>"
+                "</trans-unit>\n"
+            )
+        if len(parts) >= chunk_rows:
+            yield "".join(parts)
+            parts.clear()
+    parts.append("</body>\n</file>\n</xliff>\n")
+    yield "".join(parts)
+
+
+def write_chunks(chunks: Iterable[str], fh: IO[str]) -> int:
+    written = 0
+    for chunk in chunks:
+        fh.write(chunk)
+        written += len(chunk)
+    return written
+
+
+# ─────────────────────────── Import ───────────────────────────────
+def read_csv(fh: IO[str]) -> Iterator[Row]:
+    # Long HTML descriptions overflow the csv module's 128 KiB default.
+    csv.field_size_limit(max(csv.field_size_limit(), 16 * 1024 * 1024))
+    for rec in csv.DictReader(fh):
+        yield int(rec["product_id"]), rec["locale"], rec.get("name") or "", rec.get("description") or ""
+
+
+def read_xliff(fh: IO[bytes]) -> Iterator[Row]:
+    """iterparse-based; finished trans-units are cleared so memory stays flat."""
+    target_locale = ""
+    body = None
+    pending: Dict[int, Dict[str, str]] = {}
+    for event, elem in ET.iterparse(fh, events=("start", "end")):
+        tag = elem.tag.rsplit("}", 1)[-1]
+        if event == "start":
+            if tag == "file":
+                target_locale = elem.get("target-language", "")
+            elif tag == "body":
+                body = elem
+            continue
+        if tag != "trans-unit":
+            continue
+        pid_s, _, field = (elem.get("id") or "").partition("/")
+        target = elem.find(f"{{{_XLIFF_NS}}}target")
+        if target is None:
+            target = elem.find("target")
+        elem.clear()
+        if body is not None:
+            body.remove(elem)
+        if field not in _FIELDS or target is None or not pid_s.isdigit():
+            continue
+        pid = int(pid_s)
+        fields = pending.setdefault(pid, {})
+        fields[field] = "".join(target.itertext())
+        if len(fields) == len(_FIELDS):
+            del pending[pid]
+            yield pid, target_locale, fields["name"], fields["description"]
+    for pid, fields in pending.items():
+        yield pid, target_locale, fields.get("name", ""), fields.get("description", "")
+
+
+def _batches(rows: Iterable[Row], size: int) -> Iterator[List[Row]]:
+    it = iter(rows)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+def import_rows(
+    srv: ProductLocalizationService,
+    rows: Iterable[Row],
+    channel_id: int,
+    *,
+    batch_size: int = 50,
+    outbox=None,
+    dry_run: bool = False,
+) -> Dict[str, int]:
+    """
+    Diffs incoming rows against the store in product batches (normalized
+    HTML, so whitespace-only edits are skipped) and writes only the changes.
+    """
+    stats = {"rows": 0, "changed": 0, "unchanged": 0}
+    for batch in _batches(rows, batch_size):
+        stats["rows"] += len(batch)
+        pids = sorted({r[0] for r in batch})
+        locales = sorted({r[1] for r in batch})
+        current = {
+            (item["id"], o["locale"]): o
+            for item in srv.get_localized_products(channel_id, locales, pids)
+            for o in item["overrides"]
+        }
+
+        changes: Dict[int, Dict[str, Dict[str, str]]] = {}
+        for pid, loc, name, desc in batch:
+            cur = current.get((pid, loc)) or {}
+            if (normalized_key(name) == normalized_key(cur.get("name"))
+                    and normalized_key(desc) == normalized_key(cur.get("description"))):
+                stats["unchanged"] += 1
+                continue
+            changes.setdefault(pid, {})[loc] = {"name": name, "description": desc}
+            stats["changed"] += 1
+
+        if dry_run:
+            continue
+        for pid, payload in changes.items():
+            if outbox is not None:
+                outbox.append(pid, channel_id, payload)
+            else:
+                srv.update_all_locales(pid, payload, channel_id)
+    _LOG.info("Matrix import → %s", stats)
+    return stats
@@ -0,0 +1,210 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.config import settings
+from src.utils.circuit_breaker import OPEN, breaker
+from src.utils.logger import setup_logging
+from src.utils.priority_lanes import BULK, lane
+
+_LOG = setup_logging(__name__)
+
+
+class OverrideOutbox:
+    """
+    Write-ahead log for override mutations. Generated overrides are
+    committed here before any network call, keyed by (channel, product,
+    locale); re-appending the same key replaces the pending value, and
+    replaying a row is safe because setProductBasicInformation is a set.
+    """
+
+    def __init__(self, path: str | Path, *, max_attempts: int = 8) -> None:
+        self.path = str(path)
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                key          TEXT    PRIMARY KEY,
+                product_id   INTEGER NOT NULL,
+                channel_id   INTEGER NOT NULL,
+                locale       TEXT    NOT NULL,
+                name         TEXT,
+                description  TEXT,
+                status       TEXT    NOT NULL DEFAULT 'pending',
+                attempts     INTEGER NOT NULL DEFAULT 0,
+                next_try     REAL    NOT NULL DEFAULT 0,
+                last_error   TEXT,
+                updated_at   REAL    NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_try)")
+
+    @staticmethod
+    def key(product_id: int, channel_id: int, locale: str) -> str:
+        return f"{channel_id}:{product_id}:{locale}"
+
+    def append(self, product_id: int, channel_id: int, localized: Dict[str, Dict[str, str]]) -> List[str]:
+        """Durably records `{locale: {name, description}}`; returns the row keys."""
+        now = time.time()
+        rows = [
+            (self.key(product_id, channel_id, loc), product_id, channel_id, loc,
+             data.get("name", ""), data.get("description", ""), now)
+            for loc, data in localized.items()
+        ]
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.executemany(
+                """
+                INSERT OR REPLACE INTO outbox
+                    (key, product_id, channel_id, locale, name, description, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            self._db.execute("COMMIT")
+        return [r[0] for r in rows]
+
+    def due(self, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            cur = self._db.execute(
+                """
+                SELECT key, product_id, channel_id, locale, name, description, attempts, updated_at
+                FROM outbox WHERE status = 'pending' AND next_try <= ?
+                ORDER BY updated_at LIMIT ?
+                """,
+                (time.time(), limit),
+            )
+            cols = [c[0] for c in cur.description]
+            return [dict(zip(cols, row)) for row in cur.fetchall()]
+
+    def mark_sent(self, row: Dict[str, Any]) -> None:
+        # Guard on updated_at so a newer value appended mid-flight stays pending.
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM outbox WHERE key = ? AND updated_at = ?",
+                (row["key"], row["updated_at"]),
+            )
+
+    def mark_failed(self, row: Dict[str, Any], error: str) -> None:
+        attempts = row["attempts"] + 1
+        status = "dead" if attempts >= self.max_attempts else "pending"
+        next_try = time.time() + min(2 ** attempts, 300)
+        with self._lock:
+            self._db.execute(
+                """
+                UPDATE outbox SET attempts = ?, status = ?, next_try = ?, last_error = ?
+                WHERE key = ? AND updated_at = ?
+                """,
+                (attempts, status, next_try, error, row["key"], row["updated_at"]),
+            )
+        if status == "dead":
+            _LOG.error("Outbox gave up on %s after %s attempts → %s", row["key"], attempts, error)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._db.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status"))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class OutboxFlusher:
+    """Background thread draining the outbox in batches through the localization service."""
+
+    def __init__(self, outbox: OverrideOutbox, srv, *, batch_size: int = 50, interval: float = 1.0) -> None:
+        self.outbox = outbox
+        self.srv = srv
+        self.batch_size = batch_size
+        self.interval = interval
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="outbox-flusher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def flush_once(self) -> int:
+        # While the store is failing, rows stay pending instead of burning attempts.
+        circuit = breaker("bigcommerce")
+        if circuit.state == OPEN:
+            return 0
+        rows = self.outbox.due(self.batch_size)
+        for row in rows:
+            if circuit.state == OPEN:
+                break
+            try:
+                resp = self.srv.update_localized_product(
+                    product_id=row["product_id"],
+                    name=row["name"],
+                    description=row["description"],
+                    locale=row["locale"],
+                    channel_id=row["channel_id"],
+                )
+            except Exception as exc:
+                resp, error = None, str(exc)
+            else:
+                error = "empty_response"
+            if resp:
+                self.outbox.mark_sent(row)
+            else:
+                self.outbox.mark_failed(row, error)
+        return len(rows)
+
+    def drain(self, *, timeout: Optional[float] = None) -> Dict[str, int]:
+        """
+        Flushes in the caller's thread until no row is pending (rows in
+        backoff are waited for) or `timeout` passes; returns the final counts.
+        For CLIs that append to the outbox but run no background flusher.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with lane(BULK):
+            while self.outbox.counts().get("pending"):
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                if not self.flush_once():
+                    time.sleep(self.interval)
+        return self.outbox.counts()
+
+    def _run(self) -> None:
+        with lane(BULK):
+            while not self._stop.is_set():
+                try:
+                    sent = self.flush_once()
+                except Exception as exc:
+                    _LOG.error("Outbox flush failed → %s", exc)
+                    sent = 0
+                if sent < self.batch_size:
+                    self._wake.wait(self.interval)
+                    self._wake.clear()
+
+
+_outbox: Optional[OverrideOutbox] = None
+
+
+def default_outbox() -> Optional[OverrideOutbox]:
+    """Process-wide outbox, or None when OUTBOX_PATH is unset (direct writes)."""
+    global _outbox
+    if _outbox is None and settings.OUTBOX_PATH:
+        _outbox = OverrideOutbox(settings.OUTBOX_PATH, max_attempts=settings.OUTBOX_MAX_ATTEMPTS)
+    return _outbox
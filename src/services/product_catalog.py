@@ -0,0 +1,119 @@
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Columns the listing endpoints actually read; sent as `include_fields`.
+LISTING_FIELDS = ("id", "name", "description", "price", "categories")
+
+_NO_CATEGORY = -1
+
+
+class ProductRecord:
+    """Slotted view of one listed product (no per-instance __dict__)."""
+
+    __slots__ = ("id", "name", "description", "price", "category")
+
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        description: str = "",
+        price: Optional[float] = None,
+        category: Optional[int] = None,
+    ) -> None:
+        self.id = id
+        self.name = name
+        self.description = description
+        self.price = price
+        self.category = category
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "price": self.price,
+            "category": self.category,
+        }
+
+
+class CompactCatalog:
+    """
+    Columnar, array-backed product listing.
+    IDs/prices/categories live in typed arrays, names are interned and
+    descriptions are kept as plain str – nothing else from the raw payload.
+    """
+
+    __slots__ = ("_ids", "_prices", "_categories", "_names", "_descriptions", "_index")
+
+    def __init__(self) -> None:
+        self._ids = array("q")
+        self._prices = array("d")
+        self._categories = array("q")
+        self._names: List[str] = []
+        self._descriptions: List[str] = []
+        self._index: Dict[int, int] = {}
+
+    @classmethod
+    def from_products(cls, products: Iterable[Dict[str, Any]]) -> "CompactCatalog":
+        catalog = cls()
+        for p in products:
+            catalog.append(p)
+        return catalog
+
+    def append(self, product: Dict[str, Any]) -> None:
+        pid = int(product["id"])
+        price = product.get("price")
+        categories = product.get("categories") or []
+
+        self._index[pid] = len(self._ids)
+        self._ids.append(pid)
+        self._prices.append(float("nan") if price is None else float(price))
+        self._categories.append(int(categories[0]) if categories else _NO_CATEGORY)
+        self._names.append(sys.intern(product.get("name") or ""))
+        self._descriptions.append(product.get("description") or "")
+
+    def replace(self, product: Dict[str, Any]) -> bool:
+        """Overwrites a listed product in place; False if it is not in the catalog."""
+        i = self._index.get(int(product["id"]))
+        if i is None:
+            return False
+        price = product.get("price")
+        categories = product.get("categories") or []
+        self._prices[i] = float("nan") if price is None else float(price)
+        self._categories[i] = int(categories[0]) if categories else _NO_CATEGORY
+        self._names[i] = sys.intern(product.get("name") or "")
+        self._descriptions[i] = product.get("description") or ""
+        return True
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, product_id: int) -> bool:
+        return product_id in self._index
+
+    def __iter__(self) -> Iterator[ProductRecord]:
+        return (self._record(i) for i in range(len(self._ids)))
+
+    @property
+    def ids(self) -> array:
+        return self._ids
+
+    def _record(self, i: int) -> ProductRecord:
+        price = self._prices[i]
+        category = self._categories[i]
+        return ProductRecord(
+            id=self._ids[i],
+            name=self._names[i],
+            description=self._descriptions[i],
+            price=None if price != price else price,
+            category=None if category == _NO_CATEGORY else category,
+        )
+
+    def get(self, product_id: int) -> Optional[ProductRecord]:
+        i = self._index.get(product_id)
+        return None if i is None else self._record(i)
+
+    def page(self, offset: int, limit: int) -> List[ProductRecord]:
+        stop = min(offset + limit, len(self._ids))
+        return [self._record(i) for i in range(max(offset, 0), stop)]
@@ -0,0 +1,60 @@
+import hashlib
+from typing import NamedTuple, Optional
+
+from fastapi import Response
+
+from src.services.cache import LISTING_PAGES_TAG, LISTING_TAG, TTLCache
+from src.utils.fast_json import dumps
+
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 250
+
+
+class ListingPage(NamedTuple):
+    body: bytes
+    etag: str
+    total: int
+
+
+class ProductListing:
+    """
+    Pre-serialized `/api/products` pages sliced from the cached compact
+    catalog. Pages share the listing tag, so a membership webhook drops
+    them together with the catalog they were cut from; a plain update
+    patches the catalog and drops only the pages (LISTING_PAGES_TAG).
+    """
+
+    def __init__(self, ops, cache: Optional[TTLCache] = None) -> None:
+        self.ops = ops
+        self.cache = cache
+
+    def page(self, channel_id: int, page: int, limit: int) -> ListingPage:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        if self.cache is not None:
+            return self.cache.get_or_set(
+                ("listing", channel_id, page, limit),
+                lambda: self._render(channel_id, page, limit),
+                tags=(LISTING_TAG, LISTING_PAGES_TAG),
+            )
+        return self._render(channel_id, page, limit)
+
+    def _render(self, channel_id: int, page: int, limit: int) -> ListingPage:
+        catalog = self.ops.get_compact_catalog(channel_id)
+        body = dumps([p.as_dict() for p in catalog.page((page - 1) * limit, limit)])
+        etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        return ListingPage(body, etag, len(catalog))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def listing_response(listing: ListingPage, if_none_match: Optional[str]) -> Response:
+    """200 with the cached body, or 304 when the client already holds this page."""
+    headers = {"ETag": listing.etag, "Cache-Control": "no-cache", "X-Total-Count": str(listing.total)}
+    if etag_matches(if_none_match, listing.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=listing.body, media_type="application/json", headers=headers)
@@ -1,31 +1,53 @@
-from typing import Dict, Any, List, Union
-import json
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple, Union
 
 from src.queries.gql_multilang_queries import (
     get_product_query,
     get_update_mutation,
-    get_delete_override_mutation
+    get_delete_override_mutation,
+    get_products_page_query,
+    normalize_fields,
+    LIST_FIELDS,
+    PRODUCT_FIELDS,
 )
-from src.utils.logger import setup_logging
+from src.services.cache import CATALOG_TAG, TTLCache, product_tag
+from src.services.query_processors import process_gql_products_page
+from src.utils.logger import LazyJson, setup_logging
 
 _LOG = setup_logging()
 
 class ProductLocalizationService:
-    def __init__(self, client):
+    def __init__(self, client, cache: Optional[TTLCache] = None):
         self.client = client
+        self.cache = cache
+
+    def _invalidate(self, product_id: int) -> None:
+        if self.cache is not None:
+            self.cache.invalidate_tag(product_tag(product_id))
 
     def get_localized_data(
         self,
         product_id: int,
         channel_id: int,
-        locales: Union[str, List[str]]
+        locales: Union[str, List[str]],
+        fields: Optional[Iterable[str]] = None,
     ) -> Dict[str, Dict[str, Any]]:
+        """
+        `fields` limits the query to any of name/description/images (default
+        all); unselected keys come back as None / [].
+        """
         if isinstance(locales, str):
             locales = [locales]
+        fields = normalize_fields(fields, PRODUCT_FIELDS)
 
         results = {}
 
         for locale in locales:
+            key = ("localized", product_id, channel_id, locale, fields)
+            cached = self.cache.get(key) if self.cache is not None else None
+            if cached is not None:
+                results[locale] = cached
+                continue
+
             variables = {
                 "productId": f"bc/store/product/{product_id}",
                 "channelId": f"bc/store/channel/{channel_id}",
@@ -33,7 +55,7 @@ class ProductLocalizationService:
             }
 
             response = self.client.graphql(
-                get_product_query(),
+                get_product_query(fields),
                 variables=variables,
                 admin=True,
                 locale=locale,
@@ -62,9 +84,114 @@ class ProductLocalizationService:
                 "description": localized.get("description") or fallback.get("description"),
                 "images": images,
             }
+            if self.cache is not None:
+                self.cache.set(key, results[locale], tags=(product_tag(product_id),))
 
         return results
 
+    def get_localized_page(
+        self,
+        channel_id: int,
+        locales: List[str],
+        *,
+        first: int = 10,
+        after: Optional[str] = None,
+        product_ids: Optional[List[int]] = None,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        One GraphQL round trip per page: listing + base info + every locale
+        override. Returns (items, pageInfo) – pass pageInfo["endCursor"] back
+        as `after` to continue. `fields` defaults to name + description.
+        """
+        fields = normalize_fields(fields, LIST_FIELDS)
+        variables: Dict[str, Any] = {
+            "channelId": f"bc/store/channel/{channel_id}",
+            "first": first,
+            "after": after,
+        }
+        variables.update({f"l{i}": loc for i, loc in enumerate(locales)})
+        if product_ids:
+            variables["ids"] = [f"bc/store/product/{pid}" for pid in product_ids]
+
+        key = ("page", channel_id, tuple(locales), first, after, tuple(product_ids or ()), fields)
+        cached = self.cache.get(key) if self.cache is not None else None
+        if cached is not None:
+            return cached
+
+        response = self.client.graphql(
+            get_products_page_query(len(locales), by_ids=bool(product_ids), fields=fields),
+            variables=variables,
+            admin=True,
+        )
+        page = process_gql_products_page(response, locales)
+        if self.cache is not None and response:
+            tags = [CATALOG_TAG] + [product_tag(item["id"]) for item in page[0]]
+            self.cache.set(key, page, tags=tags)
+        return page
+
+    def iter_localized_products(
+        self,
+        channel_id: int,
+        locales: List[str],
+        *,
+        page_size: int = 50,
+        after: Optional[str] = None,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Walks the whole `store.products` connection with cursors."""
+        while True:
+            items, page_info = self.get_localized_page(
+                channel_id, locales, first=page_size, after=after, fields=fields
+            )
+            yield from items
+            after = page_info.get("endCursor")
+            if not page_info.get("hasNextPage") or not after:
+                return
+
+    def get_localized_products(
+        self,
+        channel_id: int,
+        locales: List[str],
+        product_ids: List[int],
+        *,
+        chunk_size: int = 50,
+        fields: Optional[Iterable[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Same shape as `get_localized_page`, filtered by ids (one call per chunk)."""
+        items: List[Dict[str, Any]] = []
+        for i in range(0, len(product_ids), chunk_size):
+            chunk = product_ids[i:i + chunk_size]
+            page, _ = self.get_localized_page(
+                channel_id, locales, first=len(chunk), product_ids=chunk, fields=fields
+            )
+            items.extend(page)
+        return items
+
+    def seek_cursor(self, channel_id: int, page: int, limit: int) -> Optional[str]:
+        """
+        Cursor preceding `page` (1-based); skipped pages carry no overrides.
+        The cursor after each page is cached per (channel, limit, page) under
+        CATALOG_TAG, so the walk resumes from the nearest page already seen.
+        """
+        start, after = 1, None
+        if self.cache is not None:
+            for n in range(page - 1, 0, -1):
+                cached = self.cache.get(("cursor", channel_id, limit, n))
+                if cached is not None:
+                    start, after = n + 1, cached
+                    break
+        for n in range(start, page):
+            _, page_info = self.get_localized_page(
+                channel_id, [], first=limit, after=after, fields=("name",)
+            )
+            after = page_info.get("endCursor")
+            if not page_info.get("hasNextPage") or not after:
+                break
+            if self.cache is not None:
+                self.cache.set(("cursor", channel_id, limit, n), after, tags=(CATALOG_TAG,))
+        return after
+
     def update_localized_product(
             self,
             product_id: int,
@@ -90,13 +217,12 @@ class ProductLocalizationService:
             "locale": locale
         }
 
-        _LOG.debug(f"[DEBUG] Locale={locale} | Sending mutation with payload:")
-        _LOG.debug(json.dumps(variables, indent=2, ensure_ascii=False))
+        _LOG.debug("[DEBUG] Locale=%s | Sending mutation with payload:\n%s", locale, LazyJson(variables))
 
         resp = self.client.graphql(mutation, variables=variables, admin=True, locale=locale)
+        self._invalidate(product_id)
 
-        _LOG.debug(f"[DEBUG] Response from GQL:")
-        _LOG.debug(json.dumps(resp, indent=2, ensure_ascii=False))
+        _LOG.debug("[DEBUG] Response from GQL:\n%s", LazyJson(resp))
 
         return resp
 
@@ -118,8 +244,7 @@ class ProductLocalizationService:
                 locale=locale,
                 channel_id=channel_id
             )
-            _LOG.debug(f"[DEBUG] Localized product: {locale}")
-            _LOG.debug(json.dumps(result, indent=2, ensure_ascii=False))
+            _LOG.debug("[DEBUG] Localized product: %s\n%s", locale, LazyJson(result))
             results[locale] = result
         return results
 
@@ -134,13 +259,14 @@ class ProductLocalizationService:
         Deletes specific override fields in one locale.
         Valid fields: PRODUCT_NAME_FIELD, PRODUCT_DESCRIPTION_FIELD
         """
-        field_enum = ", ".join(fields_to_remove)
-        mutation = get_delete_override_mutation(product_id, locale, field_enum, channel_id)
+        mutation, variables = get_delete_override_mutation(
+            product_id, locale, fields_to_remove, channel_id
+        )
 
-        resp = self.client.graphql(mutation, admin=True, locale=locale)
+        resp = self.client.graphql(mutation, variables=variables, admin=True, locale=locale)
+        self._invalidate(product_id)
 
-        _LOG.debug(f"[DEBUG] Response from GQL:")
-        _LOG.debug(json.dumps(resp, indent=2, ensure_ascii=False))
+        _LOG.debug("[DEBUG] Response from GQL:\n%s", LazyJson(resp))
 
         return resp
 
@@ -47,4 +47,44 @@ def process_gql_product_response(gql_response: Dict[str, Any]) -> Optional[Dict[
 
     except (KeyError, TypeError, AttributeError):
 
-        return None
\ No newline at end of file
+        return None
+
+def _entity_id(gql_id: Optional[str]) -> Optional[int]:
+    try:
+        return int(str(gql_id).rsplit("/", 1)[-1])
+    except (TypeError, ValueError):
+        return None
+
+
+def process_gql_products_page(
+    gql_response: Optional[Dict[str, Any]], locales: List[str]
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Flattens a `get_products_page_query` response into
+    ([{id, name, overrides: [{locale, name, description}]}], pageInfo).
+    """
+    items: List[Dict[str, Any]] = []
+    page_info: Dict[str, Any] = {"hasNextPage": False, "endCursor": None}
+    try:
+        products = gql_response['data']['store']['products']
+    except (KeyError, TypeError):
+        return items, page_info
+
+    page_info.update(products.get('pageInfo') or {})
+    for edge in products.get('edges') or []:
+        node = edge.get('node') or {}
+        base = node.get('basicInformation') or {}
+        overrides = []
+        for i, loc in enumerate(locales):
+            localized = (node.get(f'l{i}') or {}).get('basicInformation') or {}
+            overrides.append({
+                'locale': loc,
+                'name': localized.get('name') or base.get('name'),
+                'description': localized.get('description') or base.get('description'),
+            })
+        items.append({
+            'id': _entity_id(node.get('id')),
+            'name': overrides[0]['name'] if overrides else base.get('name'),
+            'overrides': overrides,
+        })
+    return items, page_info
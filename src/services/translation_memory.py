@@ -0,0 +1,251 @@
+"""
+Segment-level translation memory. Descriptions are cut into block-level
+segments (inline markup stays inside its segment), each segment is looked
+up per target language by exact then normalized hash, and only the misses
+of a whole batch – deduplicated – are sent to Vertex before the documents
+are reassembled around their original block tags.
+"""
+import contextvars
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from src.client.vertex_client import translate_segments
+from src.config import settings
+from src.utils.html_text import content_hash, normalized_key
+from src.utils.logger import setup_logging
+
+_LOG = setup_logging(__name__)
+
+_TAG_RE = re.compile(r"(<[^>]+>)")
+_TAG_NAME_RE = re.compile(r"</?\s*([A-Za-z][A-Za-z0-9]*)")
+_HAS_WORDS = re.compile(r"[^\W\d_]")
+_BLOCK_TAGS = frozenset({
+    "p", "div", "br", "hr", "ul", "ol", "li", "dl", "dt", "dd", "table", "thead",
+    "tbody", "tfoot", "tr", "td", "th", "h1", "h2", "h3", "h4", "h5", "h6",
+    "section", "article", "header", "footer", "blockquote", "figure", "figcaption",
+})
+_OPAQUE_TAGS = frozenset({"script", "style", "template"})
+
+
+class Segmented(NamedTuple):
+    # Skeleton parts are literal markup (str) or an index into `segments`.
+    skeleton: List[Union[str, int]]
+    segments: List[str]
+
+
+def segment_html(raw: str | None) -> Segmented:
+    skeleton: List[Union[str, int]] = []
+    segments: List[str] = []
+    buf: List[str] = []
+    opaque = 0
+
+    def flush() -> None:
+        chunk = "".join(buf)
+        buf.clear()
+        if not chunk:
+            return
+        if not _HAS_WORDS.search(_TAG_RE.sub("", chunk)):
+            skeleton.append(chunk)
+            return
+        core = chunk.strip()
+        lead, trail = chunk[: len(chunk) - len(chunk.lstrip())], chunk[len(chunk.rstrip()):]
+        if lead:
+            skeleton.append(lead)
+        skeleton.append(len(segments))
+        segments.append(core)
+        if trail:
+            skeleton.append(trail)
+
+    for part in _TAG_RE.split(raw or ""):
+        if not part:
+            continue
+        if opaque or not part.startswith("<"):
+            (skeleton if opaque else buf).append(part)
+            if opaque and part.startswith("</") and _tag_name(part) in _OPAQUE_TAGS:
+                opaque -= 1
+            continue
+        name = _tag_name(part)
+        if name in _OPAQUE_TAGS and not part.startswith("</"):
+            flush()
+            skeleton.append(part)
+            opaque += 1
+        elif name in _BLOCK_TAGS or part.startswith("<!"):
+            flush()
+            skeleton.append(part)
+        else:
+            buf.append(part)
+    flush()
+    return Segmented(skeleton, segments)
+
+
+def _tag_name(tag: str) -> str:
+    match = _TAG_NAME_RE.match(tag)
+    return match.group(1).lower() if match else ""
+
+
+def reassemble(doc: Segmented, translated: List[str]) -> str:
+    return "".join(translated[p] if isinstance(p, int) else p for p in doc.skeleton)
+
+
+class TranslationMemory:
+    """
+    (language, source segment) → translation, in SQLite. Lookups try the
+    exact source hash first, then the normalized-HTML hash so whitespace
+    and entity variants of the same boilerplate still hit.
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tm (
+                lang         TEXT NOT NULL,
+                exact_key    TEXT NOT NULL,
+                norm_key     TEXT NOT NULL,
+                source       TEXT NOT NULL,
+                target       TEXT NOT NULL,
+                updated_at   REAL NOT NULL,
+                PRIMARY KEY (lang, exact_key)
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS tm_norm ON tm (lang, norm_key)")
+        self.stats: Counter = Counter()
+
+    def lookup(self, lang: str, source: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT target FROM tm WHERE lang = ? AND exact_key = ?",
+                (lang, content_hash(source)),
+            ).fetchone()
+            if row:
+                self.stats["exact"] += 1
+                return row[0]
+            row = self._db.execute(
+                "SELECT target FROM tm WHERE lang = ? AND norm_key = ? ORDER BY updated_at DESC LIMIT 1",
+                (lang, normalized_key(source)),
+            ).fetchone()
+            self.stats["normalized" if row else "miss"] += 1
+            return row[0] if row else None
+
+    def store(self, lang: str, pairs: Iterable[Tuple[str, str]]) -> None:
+        now = time.time()
+        rows = [(lang, content_hash(src), normalized_key(src), src, dst, now) for src, dst in pairs]
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.executemany("INSERT OR REPLACE INTO tm VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._db.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def translate_products(
+    jobs: List[Dict[str, Any]],
+    source_language: str,
+    target_languages: List[str],
+    *,
+    memory: Optional[TranslationMemory] = None,
+    segments_per_call: int = 40,
+    io_workers: int = 4,
+) -> Dict[str, Tuple[Dict[str, Dict[str, str]], Optional[str]]]:
+    """
+    Same contract as `generate_multilingual_descriptions_bulk` for jobs of
+    {product_id, name, description_html}: {pid: ({lang: {product_name,
+    description}}, error)}. Languages with an untranslated segment are left
+    out; a product with no complete language gets the first call error.
+    """
+    memory = memory or default_memory()
+    langs = [l for l in target_languages if l.lower() != source_language.lower()]
+
+    # Product names go through the memory like any other segment.
+    docs = {str(j["product_id"]): (j.get("name") or "", segment_html(j.get("description_html"))) for j in jobs}
+    resolved: Dict[str, Dict[str, str]] = {lang: {} for lang in langs}
+    needed_by: Dict[str, set] = {}
+    sources: Dict[str, str] = {}
+    for name, doc in docs.values():
+        for seg in ([name] if name else []) + doc.segments:
+            key = normalized_key(seg)
+            for lang in langs:
+                if key in resolved[lang] or lang in needed_by.get(key, ()):
+                    continue
+                hit = memory.lookup(lang, seg)
+                if hit is not None:
+                    resolved[lang][key] = hit
+                else:
+                    needed_by.setdefault(key, set()).add(lang)
+                    sources[key] = seg
+
+    # One call per (language set, chunk) over the batch's unique misses.
+    groups: Dict[Tuple[str, ...], List[str]] = {}
+    for key, wanted in needed_by.items():
+        groups.setdefault(tuple(sorted(wanted)), []).append(key)
+    calls = [
+        (group, keys[i:i + segments_per_call])
+        for group, keys in groups.items()
+        for i in range(0, len(keys), segments_per_call)
+    ]
+    _LOG.info("TM → %s segments reused, %s unique misses in %s Vertex calls",
+              sum(len(v) for v in resolved.values()), len(sources), len(calls))
+
+    errors: List[str] = []
+    if calls:
+        contexts = [contextvars.copy_context() for _ in calls]
+        with ThreadPoolExecutor(max_workers=max(1, io_workers)) as pool:
+            replies = list(pool.map(
+                lambda ctx, call: ctx.run(
+                    translate_segments, [sources[k] for k in call[1]], list(call[0]), label="tm"
+                ),
+                contexts, calls,
+            ))
+        for (group, keys), (by_lang, err) in zip(calls, replies):
+            if err:
+                errors.append(err)
+                continue
+            for lang in group:
+                texts = by_lang.get(lang.lower())
+                if texts is None:
+                    continue
+                resolved[lang].update(zip(keys, texts))
+                memory.store(lang, ((sources[k], t) for k, t in zip(keys, texts)))
+
+    out: Dict[str, Tuple[Dict[str, Dict[str, str]], Optional[str]]] = {}
+    for pid, (name, doc) in docs.items():
+        translations: Dict[str, Dict[str, str]] = {}
+        seg_keys = [normalized_key(s) for s in doc.segments]
+        for lang in langs:
+            table = resolved[lang]
+            if any(k not in table for k in seg_keys) or (name and normalized_key(name) not in table):
+                continue
+            translations[lang] = {
+                "product_name": table[normalized_key(name)] if name else "",
+                "description": reassemble(doc, [table[k] for k in seg_keys]),
+            }
+        if translations or not langs:
+            out[pid] = (translations, None)
+        else:
+            out[pid] = ({}, errors[0] if errors else "incomplete_translation")
+    return out
+
+
+_memory: Optional[TranslationMemory] = None
+_memory_lock = threading.Lock()
+
+
+def default_memory() -> TranslationMemory:
+    """Process-wide memory; TM_PATH persists it across runs, empty keeps it in RAM."""
+    global _memory
+    with _memory_lock:
+        if _memory is None:
+            _memory = TranslationMemory(settings.TM_PATH or ":memory:")
+        return _memory
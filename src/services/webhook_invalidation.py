@@ -0,0 +1,132 @@
+import hashlib
+import hmac
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+from src.services.cache import (CATALOG_TAG, LISTING_PAGES_TAG, LISTING_TAG, LOCALES_TAG, TTLCache,
+                                product_tag)
+from src.utils.logger import setup_logging
+
+_LOG = setup_logging(__name__)
+
+PRODUCT_SCOPES = {
+    "store/product/updated",
+    "store/product/created",
+    "store/product/deleted",
+}
+# Scopes that change which products a channel lists, so cursor pages shift too.
+MEMBERSHIP_SCOPES = {"store/product/created", "store/product/deleted"}
+# store/channel/{id}/product/... hooks (channel assignment) are membership changes too.
+CHANNEL_PRODUCT_MARKER = "/product/"
+# Channel/locale settings scopes; anything under these drops the locale cache.
+LOCALE_SCOPE_PREFIXES = ("store/channel/", "store/locale/")
+
+
+def verify_signature(body: bytes, signature: Optional[str], secret: str, *, accept_raw: bool = False) -> bool:
+    """
+    HMAC-SHA256 of the raw body, hex encoded (optionally `sha256=` prefixed).
+    Fails closed: without a configured secret nothing verifies. BigCommerce
+    only forwards the custom headers set at hook registration, so with
+    `accept_raw` the shared secret itself is accepted as the header value.
+    """
+    if not secret or not signature:
+        return False
+    signature = signature.removeprefix("sha256=")
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    if hmac.compare_digest(signature, expected):
+        return True
+    return accept_raw and hmac.compare_digest(signature, secret)
+
+
+class InvalidationDebouncer:
+    """
+    Coalesces webhook bursts: affected product IDs accumulate for
+    `delay` seconds and are then dropped from the cache in one pass.
+    An update drops that product's entries and, through `refresh_listing`,
+    patches its record in the cached compact catalog so only the rendered
+    listing pages are re-cut. Created/deleted and channel-assignment hooks
+    (or a failed patch) drop the compact catalog and the cursor pages.
+    Invalidation is local to this process: other instances keep serving
+    their own copies for up to CACHE_TTL_SECONDS.
+    """
+
+    def __init__(self, cache: TTLCache, delay: float = 2.0,
+                 refresh_listing: Optional[Callable[[Iterable[int]], bool]] = None) -> None:
+        self.cache = cache
+        self.delay = delay
+        self.refresh_listing = refresh_listing
+        self._products: Set[int] = set()
+        self._updated: Set[int] = set()
+        self._listing = False
+        self._catalog = False
+        self._locales = False
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    def submit(self, payload: Dict[str, Any]) -> bool:
+        scope = payload.get("scope") or ""
+        data = payload.get("data")
+        if not isinstance(data, dict):
+            data = {}
+
+        with self._lock:
+            if scope in PRODUCT_SCOPES:
+                try:
+                    self._products.add(int(data.get("id")))
+                except (TypeError, ValueError):
+                    _LOG.warning("Webhook %s without product id → %s", scope, data)
+                    return False
+                if scope in MEMBERSHIP_SCOPES:
+                    self._listing = self._catalog = True
+                else:
+                    self._updated.add(int(data["id"]))
+            elif scope.startswith("store/channel/") and CHANNEL_PRODUCT_MARKER in scope:
+                self._listing = self._catalog = True
+            elif scope.startswith(LOCALE_SCOPE_PREFIXES):
+                self._locales = True
+            else:
+                return False
+
+            immediate = self.delay <= 0
+            if not immediate and self._timer is None:
+                self._timer = threading.Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if immediate:
+            self.flush()
+        return True
+
+    def flush(self) -> Dict[str, int]:
+        # Take the batch under the lock; the listing patch may call upstream.
+        with self._lock:
+            products, updated = self._products, self._updated
+            listing, catalog, locales = self._listing, self._catalog, self._locales
+            self._products, self._updated = set(), set()
+            self._listing = self._catalog = self._locales = False
+            self._timer = None
+
+        dropped = sum(self.cache.invalidate_tag(product_tag(pid)) for pid in products)
+        if updated and not listing:
+            listing = not self._patch_listing(updated)
+            if not listing:
+                dropped += self.cache.invalidate_tag(LISTING_PAGES_TAG)
+        if listing:
+            dropped += self.cache.invalidate_tag(LISTING_TAG)
+        if catalog:
+            dropped += self.cache.invalidate_tag(CATALOG_TAG)
+        if locales:
+            dropped += self.cache.invalidate_tag(LOCALES_TAG)
+
+        stats = {"products": len(products), "entries": dropped}
+        _LOG.info("Webhook flush → %s products, %s cache entries dropped", *stats.values())
+        return stats
+
+    def _patch_listing(self, product_ids: Set[int]) -> bool:
+        """True when the cached compact catalog was patched in place."""
+        if self.refresh_listing is None:
+            return False
+        try:
+            return self.refresh_listing(product_ids)
+        except Exception:
+            _LOG.exception("Patching the cached listing failed; dropping it instead")
+            return False
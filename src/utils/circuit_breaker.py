@@ -0,0 +1,169 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, Optional
+
+from src.config import settings
+from src.utils.logger import setup_logging
+
+_LOG = setup_logging(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """4xx answers mean the upstream is up; only 429/5xx/transport errors count against it."""
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status is None or status == 429 or status >= 500
+
+
+class CircuitBreaker:
+    """
+    Rolling-window breaker for one upstream. Opens when the failure rate
+    (errors plus calls slower than `slow_call_seconds`) over the last
+    `window` calls reaches `failure_rate`; after `open_seconds` it lets
+    `probes` calls through and closes again only if they all succeed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_rate: float = 0.5,
+        min_calls: int = 10,
+        window: int = 20,
+        slow_call_seconds: float = 5.0,
+        open_seconds: float = 30.0,
+        probes: int = 1,
+    ) -> None:
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.probes = probes
+
+        self._outcomes: deque = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_left = 0
+        self._probe_successes = 0
+        self._times_opened = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes_left = self.probes
+            self._probe_successes = 0
+            _LOG.info("Circuit %s half-open → probing", self.name)
+
+    def allow(self) -> bool:
+        """True if a call may go out now; counts the rejection otherwise."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes_left > 0:
+                self._probes_left -= 1
+                return True
+            self._rejected += 1
+            return False
+
+    def record(self, ok: bool, elapsed: float = 0.0) -> None:
+        failed = not ok or elapsed >= self.slow_call_seconds
+        with self._lock:
+            if self._state == HALF_OPEN:
+                if failed:
+                    self._open("probe failed")
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.probes:
+                        self._state = CLOSED
+                        self._outcomes.clear()
+                        _LOG.info("Circuit %s closed", self.name)
+                return
+
+            self._outcomes.append(failed)
+            if self._state == CLOSED and len(self._outcomes) >= self.min_calls:
+                rate = sum(self._outcomes) / len(self._outcomes)
+                if rate >= self.failure_rate:
+                    self._open(f"failure rate {rate:.0%}")
+
+    def _open(self, reason: str) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._times_opened += 1
+        _LOG.warning("Circuit %s OPEN (%s) for %.0fs", self.name, reason, self.open_seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._maybe_half_open()
+            window = len(self._outcomes)
+            return {
+                "state": self._state,
+                "failure_rate": round(sum(self._outcomes) / window, 3) if window else 0.0,
+                "window": window,
+                "times_opened": self._times_opened,
+                "rejected": self._rejected,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+_SLOW_CALL_SECONDS = {
+    "bigcommerce": lambda: settings.BREAKER_SLOW_CALL_SECONDS,
+    "vertex": lambda: settings.VERTEX_BREAKER_SLOW_CALL_SECONDS,
+}
+
+
+def breaker(name: str) -> CircuitBreaker:
+    """Process-wide breaker per upstream (`bigcommerce`, `vertex`)."""
+    with _registry_lock:
+        if name not in _breakers:
+            slow = _SLOW_CALL_SECONDS.get(name, lambda: settings.BREAKER_SLOW_CALL_SECONDS)()
+            _breakers[name] = CircuitBreaker(
+                name,
+                failure_rate=settings.BREAKER_FAILURE_RATE,
+                min_calls=settings.BREAKER_MIN_CALLS,
+                window=settings.BREAKER_WINDOW,
+                slow_call_seconds=slow,
+                open_seconds=settings.BREAKER_OPEN_SECONDS,
+            )
+        return _breakers[name]
+
+
+def snapshot() -> Dict[str, Any]:
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return {
+        "open": sum(1 for b in breakers if b.state != CLOSED),
+        "breakers": {b.name: b.snapshot() for b in breakers},
+    }
+
+
+def wait_until_closed(names: Iterable[str], *, poll: float = 5.0, timeout: Optional[float] = None) -> bool:
+    """Pauses bulk work while any of `names` is open; False if `timeout` ran out."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    names = list(names)
+    paused = False
+    while any(breaker(n).state == OPEN for n in names):
+        if not paused:
+            _LOG.warning("Bulk work paused: circuit open for %s", names)
+            paused = True
+        if deadline is not None and time.monotonic() >= deadline:
+            return False
+        time.sleep(poll)
+    if paused:
+        _LOG.info("Bulk work resumed")
+    return True
@@ -0,0 +1,77 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, List, Optional, TypeVar
+
+from src.config import settings
+from src.utils.logger import setup_logging
+
+_LOG = setup_logging(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class CpuExecutor:
+    """
+    Runs CPU-bound transforms (HTML stripping, prompt building, output
+    parsing) either inline or on a process pool in chunked batches.
+    Small batches always run inline – pickling them costs more than it saves.
+    `fn` must be a module-level (picklable) function.
+    """
+
+    def __init__(
+        self,
+        mode: str = "inline",
+        *,
+        workers: int = 0,
+        chunksize: int = 8,
+        min_items: int = 16,
+    ) -> None:
+        if mode not in ("inline", "process"):
+            raise ValueError(f"unknown executor mode: {mode}")
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.chunksize = max(1, chunksize)
+        self.min_items = min_items
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                _LOG.info("Starting CPU process pool workers=%s", self.workers)
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        items = list(items)
+        if self.mode == "inline" or len(items) < self.min_items:
+            return [fn(item) for item in items]
+        return list(self._get_pool().map(fn, items, chunksize=self.chunksize))
+
+    async def amap(self, fn: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        """Same as `map` without blocking the event loop."""
+        return await asyncio.to_thread(self.map, fn, items)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+
+_default: Optional[CpuExecutor] = None
+
+
+def default_executor() -> CpuExecutor:
+    global _default
+    if _default is None:
+        _default = CpuExecutor(
+            settings.CPU_POOL_MODE,
+            workers=settings.CPU_POOL_WORKERS,
+            chunksize=settings.CPU_POOL_CHUNKSIZE,
+            min_items=settings.CPU_POOL_MIN_ITEMS,
+        )
+    return _default
@@ -0,0 +1,41 @@
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+def loads(data: bytes | str) -> Any:
+    """orjson when installed, stdlib otherwise; both raise ValueError on bad input."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decode_response(resp) -> Any:
+    """
+    Drop-in for `requests.Response.json()` that decodes the raw bytes.
+    Stdlib on purpose: upstream bodies are mostly long UTF-8 descriptions,
+    where orjson measured slower (benchmarks/bench_json.py).
+    """
+    return json.loads(resp.content)
+
+
+class FastJSONResponse(JSONResponse):
+    """Default response class; skips the stdlib encoder when orjson is present."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
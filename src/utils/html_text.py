@@ -0,0 +1,125 @@
+import hashlib
+import re
+from collections import OrderedDict
+from html import unescape
+from html.parser import HTMLParser
+from typing import List
+
+try:
+    from lxml import html as lxml_html
+
+    LXML_AVAILABLE = True
+except ImportError:
+    lxml_html = None
+    LXML_AVAILABLE = False
+
+_WS = re.compile(r"\s+")
+_INTER_TAG_WS = re.compile(r">\s+<")
+_SKIP_TAGS = frozenset({"script", "style", "template"})
+
+# Rough chars-per-token ratio used for prompt budgets (Gemini ≈ 4).
+CHARS_PER_TOKEN = 4
+_CACHE_SIZE = 4096
+
+
+class _TextCollector(HTMLParser):
+    """Streaming extractor: keeps text nodes only, no tree is built."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.chunks: List[str] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.chunks.append(data)
+
+
+class _LRU(OrderedDict):
+    def __init__(self, maxsize: int) -> None:
+        super().__init__()
+        self.maxsize = maxsize
+
+    def lookup(self, key):
+        value = self.get(key)
+        if value is not None:
+            self.move_to_end(key)
+        return value
+
+    def store(self, key, value):
+        self[key] = value
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+        return value
+
+
+_text_cache = _LRU(_CACHE_SIZE)
+
+
+def content_hash(raw: str) -> str:
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def collapse_ws(text: str) -> str:
+    return _WS.sub(" ", text).strip()
+
+
+def _extract(raw: str) -> str:
+    if "<" not in raw:
+        return collapse_ws(unescape(raw))
+    if LXML_AVAILABLE:
+        try:
+            root = lxml_html.fragment_fromstring(raw, create_parent="div")
+            for bad in root.xpath("//script|//style|//template"):
+                bad.drop_tree()
+            return collapse_ws(" ".join(root.itertext()))
+        except Exception:
+            pass
+    collector = _TextCollector()
+    collector.feed(raw)
+    collector.close()
+    return collapse_ws(" ".join(collector.chunks))
+
+
+def html_to_text(raw: str | None) -> str:
+    """Plain text of an HTML fragment, whitespace collapsed, memoized by content hash."""
+    if not raw:
+        return ""
+    key = content_hash(raw)
+    cached = _text_cache.lookup(key)
+    if cached is not None:
+        return cached
+    return _text_cache.store(key, _extract(raw))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cuts `text` on a word boundary so it fits ~`max_tokens` prompt tokens."""
+    limit = max_tokens * CHARS_PER_TOKEN
+    if max_tokens <= 0 or len(text) <= limit:
+        return text
+    cut = text.rfind(" ", 0, limit)
+    return text[: cut if cut > 0 else limit].rstrip() + "…"
+
+
+def prompt_text(raw: str | None, max_tokens: int = 0) -> str:
+    """HTML → text ready for a prompt, optionally capped to a token budget."""
+    return truncate_tokens(html_to_text(raw), max_tokens)
+
+
+def normalize_html(raw: str | None) -> str:
+    """Canonical form used for diffing and cache keys (markup kept, whitespace folded)."""
+    if not raw:
+        return ""
+    return collapse_ws(_INTER_TAG_WS.sub("><", unescape(raw)))
+
+
+def normalized_key(raw: str | None) -> str:
+    return content_hash(normalize_html(raw))
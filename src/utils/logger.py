@@ -1,12 +1,54 @@
+import json
 import logging
+import random
 from src.config import settings
 
+
+class LazyJson:
+    """Defers json.dumps until a handler actually formats the record."""
+
+    __slots__ = ("obj", "indent")
+
+    def __init__(self, obj, indent: int = 2):
+        self.obj = obj
+        self.indent = indent
+
+    def __str__(self) -> str:
+        return json.dumps(self.obj, indent=self.indent, ensure_ascii=False, default=str)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line – cheaper to ship and query than free text."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def sampled(rate: float | None = None) -> bool:
+    """True for roughly `rate` of calls; used to thin out per-request logs."""
+    rate = settings.LOG_SAMPLE_RATE if rate is None else rate
+    return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
 def setup_logging(name: str = None) -> logging.Logger:
     if not logging.getLogger().hasHandlers():
         log_level = logging.DEBUG if settings.DEBUG_MODE else logging.INFO
-        logging.basicConfig(
-            level=log_level,
-            format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        )
+        if settings.LOG_FORMAT == "json":
+            handler = logging.StreamHandler()
+            handler.setFormatter(JsonFormatter())
+            logging.basicConfig(level=log_level, handlers=[handler])
+        else:
+            logging.basicConfig(
+                level=log_level,
+                format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+            )
 
-    return logging.getLogger(name if name else __name__)
\ No newline at end of file
+    return logging.getLogger(name if name else __name__)
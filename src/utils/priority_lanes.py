@@ -0,0 +1,109 @@
+import contextvars
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from src.config import settings
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+LANES = (INTERACTIVE, BULK)
+
+_current_lane: contextvars.ContextVar[str] = contextvars.ContextVar("upstream_lane", default=INTERACTIVE)
+
+
+def current_lane() -> str:
+    return _current_lane.get()
+
+
+@contextmanager
+def lane(name: str) -> Iterator[None]:
+    """Tags every upstream call made inside the block with `name`."""
+    if name not in LANES:
+        raise ValueError(f"unknown lane: {name}")
+    token = _current_lane.set(name)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+class LaneScheduler:
+    """
+    Shared upstream concurrency split into two lanes. Interactive calls
+    may use every slot and go first whenever they are waiting; bulk calls
+    are capped at `capacity - reserved` and yield to queued interactive
+    work at each call boundary.
+    """
+
+    def __init__(self, capacity: int = 8, reserved: int = 2) -> None:
+        if not 0 <= reserved < capacity:
+            raise ValueError("reserved interactive slots must be in [0, capacity)")
+        self.capacity = capacity
+        self.reserved = reserved
+        self._cond = threading.Condition()
+        self._active: Counter = Counter()
+        self._waiting: Counter = Counter()
+        self._served: Counter = Counter()
+        self._wait_seconds: Counter = Counter()
+
+    def _can_run(self, name: str) -> bool:
+        if sum(self._active.values()) >= self.capacity:
+            return False
+        if name == INTERACTIVE:
+            return True
+        return (self._active[BULK] < self.capacity - self.reserved
+                and self._waiting[INTERACTIVE] == 0)
+
+    @contextmanager
+    def slot(self, name: Optional[str] = None) -> Iterator[None]:
+        name = name or current_lane()
+        start = time.perf_counter()
+        with self._cond:
+            self._waiting[name] += 1
+            try:
+                while not self._can_run(name):
+                    self._cond.wait()
+            finally:
+                self._waiting[name] -= 1
+            self._active[name] += 1
+            self._wait_seconds[name] += time.perf_counter() - start
+            # Bulk waiters may have been blocked only by this waiter.
+            self._cond.notify_all()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active[name] -= 1
+                self._served[name] += 1
+                self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "capacity": self.capacity,
+                "reserved_interactive": self.reserved,
+                "lanes": {
+                    name: {
+                        "active": self._active[name],
+                        "waiting": self._waiting[name],
+                        "served": self._served[name],
+                        "wait_seconds": round(self._wait_seconds[name], 3),
+                    }
+                    for name in LANES
+                },
+            }
+
+
+_scheduler: Optional[LaneScheduler] = None
+_lock = threading.Lock()
+
+
+def default_scheduler() -> LaneScheduler:
+    global _scheduler
+    with _lock:
+        if _scheduler is None:
+            _scheduler = LaneScheduler(settings.LANE_CAPACITY, settings.LANE_INTERACTIVE_RESERVED)
+        return _scheduler
@@ -0,0 +1,105 @@
+import contextvars
+import hashlib
+import time
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, Optional
+
+from src.config import settings
+from src.utils.logger import setup_logging
+
+_LOG = setup_logging(__name__)
+
+
+class UpstreamBudgetExceeded(RuntimeError):
+    """Raised in reject mode once an inbound request exceeds its upstream call budget."""
+
+
+class RequestStats:
+    """Upstream calls made on behalf of one inbound request."""
+
+    __slots__ = ("path", "calls", "bytes", "elapsed", "by_kind", "signatures", "flagged", "started")
+
+    def __init__(self, path: str = "") -> None:
+        self.path = path
+        self.calls = 0
+        self.bytes = 0
+        self.elapsed = 0.0
+        self.by_kind: Counter = Counter()
+        self.signatures: Counter = Counter()
+        self.flagged: set = set()
+        self.started = time.perf_counter()
+
+    def server_timing(self) -> str:
+        total = (time.perf_counter() - self.started) * 1000
+        parts = [f'upstream;dur={self.elapsed * 1000:.1f};desc="{self.calls} calls, {self.bytes} B"']
+        parts += [f"{kind};desc=\"{n} calls\"" for kind, n in sorted(self.by_kind.items())]
+        if self.flagged:
+            parts.append(f'dup;desc="{len(self.flagged)} repeated"')
+        parts.append(f"total;dur={total:.1f}")
+        return ", ".join(parts)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "bytes": self.bytes, "elapsed": round(self.elapsed, 4),
+                "by_kind": dict(self.by_kind), "repeated": len(self.flagged)}
+
+
+_current: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "upstream_request_stats", default=None
+)
+
+
+def begin(path: str = "") -> contextvars.Token:
+    return _current.set(RequestStats(path))
+
+
+def end(token: contextvars.Token) -> None:
+    _current.reset(token)
+
+
+def current() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def call_signature(method: str, url: str, body: Any = None) -> str:
+    digest = hashlib.blake2b(repr(body).encode("utf-8"), digest_size=8).hexdigest() if body else ""
+    return f"{method} {url} {digest}"
+
+
+def record(kind: str, signature: str, nbytes: int, elapsed: float) -> None:
+    """Accounts one upstream call; no-op outside an inbound request."""
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.calls += 1
+    stats.bytes += nbytes
+    stats.elapsed += elapsed
+    stats.by_kind[kind] += 1
+    stats.signatures[signature] += 1
+    if stats.signatures[signature] == 2:
+        stats.flagged.add(signature)
+        _LOG.warning("Repeated upstream call in %s → %s", stats.path, signature)
+
+
+def check_budget() -> None:
+    """Call before each upstream request; warns once, or rejects in reject mode."""
+    stats = _current.get()
+    budget = settings.UPSTREAM_CALL_BUDGET
+    if stats is None or budget <= 0 or stats.calls < budget:
+        return
+    if settings.UPSTREAM_BUDGET_MODE == "reject":
+        raise UpstreamBudgetExceeded(f"{stats.path} exceeded {budget} upstream calls")
+    if stats.calls == budget:
+        _LOG.warning("Upstream call budget (%s) exceeded in %s", budget, stats.path)
+
+
+async def account_stream(body: AsyncIterator[bytes], stats: RequestStats) -> AsyncIterator[bytes]:
+    """
+    Passes a streamed body through and logs the request's upstream totals
+    after the last chunk: headers went out before the calls were made.
+    """
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        _LOG.info("Streamed %s → upstream %s in %.1f ms", stats.path, stats.as_dict(),
+                  (time.perf_counter() - stats.started) * 1000)
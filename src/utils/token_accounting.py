@@ -0,0 +1,191 @@
+import contextvars
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence
+
+from src.config import settings
+from src.utils.html_text import CHARS_PER_TOKEN
+from src.utils.logger import setup_logging
+
+_LOG = setup_logging(__name__)
+
+# Output budget per language block asked of Gemini (≈240 words of HTML).
+OUTPUT_TOKENS_PER_LANGUAGE = 400
+
+_current_job: contextvars.ContextVar[str] = contextvars.ContextVar("token_job", default="adhoc")
+
+
+@contextmanager
+def job(name: str) -> Iterator[None]:
+    """Attributes every Vertex call made inside the block to job `name`."""
+    token = _current_job.set(name)
+    try:
+        yield
+    finally:
+        _current_job.reset(token)
+
+
+def estimate_tokens(text: str) -> int:
+    """Dry-run tokenizer: the same chars-per-token ratio the prompt budgets use."""
+    return max(1, -(-len(text) // CHARS_PER_TOKEN)) if text else 0
+
+
+def usage_from_response(data: Dict[str, Any]) -> tuple[int, int]:
+    """(prompt tokens, output tokens) from a Gemini `usageMetadata` block."""
+    usage = data.get("usageMetadata") or {}
+    return int(usage.get("promptTokenCount") or 0), int(usage.get("candidatesTokenCount") or 0)
+
+
+def estimate_cost(
+    prompts: Iterable[str],
+    languages_per_prompt: int,
+    *,
+    input_per_1m: Optional[float] = None,
+    output_per_1m: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Tokens and USD a run would cost, without calling Vertex."""
+    input_per_1m = settings.VERTEX_PRICE_INPUT_PER_1M if input_per_1m is None else input_per_1m
+    output_per_1m = settings.VERTEX_PRICE_OUTPUT_PER_1M if output_per_1m is None else output_per_1m
+    calls = prompt_tokens = 0
+    for prompt in prompts:
+        calls += 1
+        prompt_tokens += estimate_tokens(prompt)
+    output_tokens = calls * languages_per_prompt * OUTPUT_TOKENS_PER_LANGUAGE
+    return {
+        "calls": calls,
+        "prompt_tokens": prompt_tokens,
+        "output_tokens": output_tokens,
+        "cost_usd": round(prompt_tokens / 1e6 * input_per_1m + output_tokens / 1e6 * output_per_1m, 4),
+    }
+
+
+class TokenLedger:
+    """
+    Process-wide Vertex usage: totals per model, per job, per product and
+    per language (a call's output is split evenly across its languages),
+    plus a one-minute window for tokens-per-minute and latency.
+    """
+
+    def __init__(self, window_seconds: float = 60.0) -> None:
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._window: deque = deque()  # (t, tokens, latency)
+        self.by_model: Dict[str, Counter] = {}
+        self.by_job: Dict[str, Counter] = {}
+        self.by_product: Counter = Counter()
+        self.by_language: Counter = Counter()
+
+    def record(
+        self,
+        model: str,
+        prompt_tokens: int,
+        output_tokens: int,
+        latency: float,
+        *,
+        product_id: str = "",
+        languages: Sequence[str] = (),
+    ) -> None:
+        total = prompt_tokens + output_tokens
+        now = time.monotonic()
+        with self._lock:
+            for bucket in (self.by_model.setdefault(model, Counter()),
+                           self.by_job.setdefault(_current_job.get(), Counter())):
+                bucket["calls"] += 1
+                bucket["prompt_tokens"] += prompt_tokens
+                bucket["output_tokens"] += output_tokens
+                bucket["latency_ms"] += int(latency * 1000)
+            if product_id:
+                self.by_product[product_id] += total
+            for lang in languages:
+                self.by_language[lang] += output_tokens // len(languages)
+            self._window.append((now, total, latency))
+            self._trim(now)
+
+    def _trim(self, now: float) -> None:
+        while self._window and now - self._window[0][0] > self.window_seconds:
+            self._window.popleft()
+
+    def window(self) -> Dict[str, float]:
+        """Calls, tokens/min and mean tokens/latency per call over the last window."""
+        with self._lock:
+            self._trim(time.monotonic())
+            calls = len(self._window)
+            tokens = sum(t for _, t, _ in self._window)
+            latency = sum(l for _, _, l in self._window)
+        scale = 60.0 / self.window_seconds
+        return {
+            "calls": calls,
+            "tokens_per_minute": round(tokens * scale, 1),
+            "tokens_per_call": round(tokens / calls, 1) if calls else 0.0,
+            "latency_per_call": round(latency / calls, 3) if calls else 0.0,
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            models = {m: dict(c) for m, c in self.by_model.items()}
+            jobs = {j: dict(c) for j, c in self.by_job.items()}
+            languages = dict(self.by_language)
+            top_products = dict(self.by_product.most_common(10))
+        return {"window": self.window(), "models": models, "jobs": jobs,
+                "languages": languages, "top_products": top_products}
+
+
+class ThroughputController:
+    """
+    Sizes Vertex concurrency from observed tokens/call and latency so the
+    run stays under `tpm_limit`, and holds calls back once the last
+    minute's tokens already reach the limit. `tpm_limit=0` disables both.
+    """
+
+    def __init__(self, ledger: TokenLedger, tpm_limit: int = 0, max_workers: int = 16) -> None:
+        self.ledger = ledger
+        self.tpm_limit = tpm_limit
+        self.max_workers = max_workers
+
+    def workers(self, default: int) -> int:
+        stats = self.ledger.window()
+        if self.tpm_limit <= 0 or not stats["calls"]:
+            return default
+        calls_per_minute = self.tpm_limit / max(stats["tokens_per_call"], 1.0)
+        # Little's law: in-flight calls = arrival rate × time in system.
+        in_flight = calls_per_minute / 60.0 * max(stats["latency_per_call"], 0.1)
+        return max(1, min(self.max_workers, int(in_flight)))
+
+    def wait(self, estimated_tokens: int, *, poll: float = 1.0) -> None:
+        if self.tpm_limit <= 0:
+            return
+        waited = False
+        while True:
+            used = self.ledger.window()["tokens_per_minute"]
+            # An empty window always admits the call, however large.
+            if not used or used + estimated_tokens <= self.tpm_limit:
+                break
+            if not waited:
+                _LOG.info("Vertex at %s TPM → throttling", self.tpm_limit)
+                waited = True
+            time.sleep(poll)
+
+
+_ledger: Optional[TokenLedger] = None
+_controller: Optional[ThroughputController] = None
+_lock = threading.Lock()
+
+
+def default_ledger() -> TokenLedger:
+    global _ledger
+    with _lock:
+        if _ledger is None:
+            _ledger = TokenLedger()
+        return _ledger
+
+
+def default_controller() -> ThroughputController:
+    global _controller
+    ledger = default_ledger()
+    with _lock:
+        if _controller is None:
+            _controller = ThroughputController(ledger, settings.VERTEX_TPM_LIMIT,
+                                               settings.VERTEX_MAX_CONCURRENCY)
+        return _controller
@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# src.config requires these at import time; the cache never talks to an upstream.
+for _key in ("BC_STORE_HASH", "BC_ACCESS_TOKEN", "VERTEX_API_KEY", "VERTEX_MODEL_ID"):
+    os.environ.setdefault(_key, "test")
+
+from src.services.cache import TTLCache  # noqa: E402
+
+CALLERS = 16
+
+
+def _concurrent_misses(cache, key, factory, tags=()):
+    start = threading.Barrier(CALLERS)
+
+    def call():
+        start.wait()
+        return cache.get_or_set(key, factory, tags=tags)
+
+    with ThreadPoolExecutor(CALLERS) as pool:
+        futures = [pool.submit(call) for _ in range(CALLERS)]
+        return [f.result() for f in futures]
+
+
+def test_get_or_set_runs_factory_once_for_concurrent_misses():
+    cache = TTLCache(ttl=60)
+    calls = []
+
+    def factory():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"catalog": len(calls)}
+
+    results = _concurrent_misses(cache, "catalog", factory, tags=("listing",))
+
+    assert len(calls) == 1
+    assert results == [{"catalog": 1}] * CALLERS
+    assert cache.get("catalog") == {"catalog": 1}
+
+
+def test_get_or_set_shares_factory_error_and_retries_next_time():
+    cache = TTLCache(ttl=60)
+    calls = []
+
+    def failing():
+        calls.append(1)
+        time.sleep(0.1)
+        raise RuntimeError("upstream down")
+
+    start = threading.Barrier(CALLERS)
+
+    def call():
+        start.wait()
+        with pytest.raises(RuntimeError):
+            cache.get_or_set("catalog", failing)
+
+    with ThreadPoolExecutor(CALLERS) as pool:
+        for f in [pool.submit(call) for _ in range(CALLERS)]:
+            f.result()
+
+    assert len(calls) == 1
+    assert cache.get_or_set("catalog", lambda: "fresh") == "fresh"
+
+
+def test_invalidate_tag_mid_flight_does_not_cache_stale_value():
+    cache = TTLCache(ttl=60)
+    loading = threading.Event()
+    release = threading.Event()
+
+    def slow():
+        loading.set()
+        release.wait(5)
+        return "stale"
+
+    with ThreadPoolExecutor(1) as pool:
+        pending = pool.submit(cache.get_or_set, "catalog", slow, tags=("listing",))
+        loading.wait(5)
+        cache.invalidate_tag("listing")
+        release.set()
+        assert pending.result() == "stale"
+
+    assert cache.get("catalog") is None
+    assert cache.get_or_set("catalog", lambda: "fresh", tags=("listing",)) == "fresh"